@@ -1,11 +1,59 @@
-from fastapi import APIRouter, HTTPException, status
-from app.models.chat import ChatRequest, ChatResponse
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.models.chat import (
+    ChatMessage, ChatRequest, ChatResponse, Conversation, ConversationCreateResponse,
+    ConversationTurnRequest, ConversationTurnResponse, UsageSummary
+)
 from app.services.groq_client import groq_service
+from app.services.groq_resilience import GroqServiceError
+from app.services.repositories.conversations_repo_railway import ConversationsRepositoryRailway
+from app.services.repositories.conversations_repo_railway_async import ConversationsRepositoryRailwayAsync
+from app.services.repositories.clients_repo_railway import ClientsRepositoryRailway
+from app.services.repositories.clients_repo_railway_async import ClientsRepositoryRailwayAsync
+from app.services.repositories.plans_repo_railway import PlansRepositoryRailway
+from app.services.repositories.plans_repo_railway_async import PlansRepositoryRailwayAsync
+from app.services.repositories.usage_repo_railway import UsageRepositoryRailway
+from app.services.repositories.usage_repo_railway_async import UsageRepositoryRailwayAsync
+from app.services.db_railway import repository_dependency
+from datetime import date
+from typing import List, Optional
+import json
 
 router = APIRouter()
 
+get_conversations_repo = repository_dependency(ConversationsRepositoryRailway, ConversationsRepositoryRailwayAsync)
+get_usage_repo = repository_dependency(UsageRepositoryRailway, UsageRepositoryRailwayAsync)
+get_clients_repo = repository_dependency(ClientsRepositoryRailway, ClientsRepositoryRailwayAsync)
+get_plans_repo = repository_dependency(PlansRepositoryRailway, PlansRepositoryRailwayAsync)
+
+# Default username for single-user system
+DEFAULT_USERNAME = "admin"
+
+def _upstream_error(e: GroqServiceError) -> HTTPException:
+    """Report a Groq admission/upstream failure with its status and Retry-After"""
+    headers = None
+    if e.retry_after is not None:
+        headers = {"Retry-After": str(max(int(e.retry_after + 0.999), 1))}
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+async def _client_context(client_id: Optional[str], clients_repo, plans_repo) -> Optional[str]:
+    """Profile and current plan block for client-aware chat; 404 if the client is unknown"""
+    if not client_id:
+        return None
+    context = await groq_service.client_context.get(client_id, DEFAULT_USERNAME, clients_repo, plans_repo)
+    if context is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    return context
+
 @router.post("/", response_model=ChatResponse)
-async def send_chat_message(request: ChatRequest):
+async def send_chat_message(
+    request: ChatRequest,
+    clients_repo=Depends(get_clients_repo),
+    plans_repo=Depends(get_plans_repo)
+):
     try:
         if not request.user_input.strip():
             raise HTTPException(
@@ -13,12 +61,203 @@ async def send_chat_message(request: ChatRequest):
                 detail="User input cannot be empty"
             )
         
-        response = groq_service.send_message(request)
+        context = await _client_context(request.client_id, clients_repo, plans_repo)
+        response = await groq_service.send_message(request, context=context)
         return response
     except HTTPException:
         raise
+    except GroqServiceError as e:
+        raise _upstream_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Chat service error: {str(e)}"
         )
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def stream_chat_message(
+    request: ChatRequest,
+    clients_repo=Depends(get_clients_repo),
+    plans_repo=Depends(get_plans_repo)
+):
+    """Stream the assistant reply as server-sent events.
+
+    Emits ``token`` events carrying each text delta, then a single ``done``
+    event with the full ChatResponse (updated conversation_history and
+    usage), or an ``error`` event if the upstream call fails mid-stream.
+    """
+    if not request.user_input.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User input cannot be empty"
+        )
+    
+    context = await _client_context(request.client_id, clients_repo, plans_repo)
+    
+    async def event_stream():
+        try:
+            async for item in groq_service.stream_message(request, context=context):
+                if isinstance(item, ChatResponse):
+                    yield _sse_event("done", item.model_dump())
+                else:
+                    yield _sse_event("token", {"content": item})
+        except GroqServiceError as e:
+            yield _sse_event("error", {"detail": str(e), "status_code": e.status_code, "retry_after": e.retry_after})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Chat service error: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def get_chat_cache_stats():
+    """Response cache hit/miss counters and single-flight coalescing counts"""
+    cache_stats = {"enabled": False}
+    if groq_service.cache is not None:
+        cache_stats = {"enabled": True, **groq_service.cache.stats()}
+    
+    single_flight_stats = {"enabled": False}
+    if groq_service.single_flight is not None:
+        single_flight_stats = {"enabled": True, **groq_service.single_flight.stats()}
+    
+    return {"cache": cache_stats, "single_flight": single_flight_stats}
+
+@router.get("/upstream/stats")
+async def get_upstream_stats():
+    """Groq admission metrics (concurrency, queueing, retries) and per-model latency and breaker"""
+    return {**groq_service.admission.stats(), "models": groq_service.router.stats()}
+
+@router.get("/context/stats")
+async def get_client_context_stats():
+    """Hit/miss counters for cached client context blocks"""
+    return groq_service.client_context.stats()
+
+@router.get("/usage", response_model=List[UsageSummary])
+async def get_usage(
+    group_by: str = Query("day", pattern="^(day|client|model)$"),
+    date_from: Optional[date] = Query(None, alias="from", description="First day (YYYY-MM-DD, UTC), inclusive"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day (YYYY-MM-DD, UTC), inclusive"),
+    client_id: Optional[str] = None,
+    model: Optional[str] = None,
+    usage_repo=Depends(get_usage_repo)
+):
+    """Token usage, cache hits and latency aggregated per day, client or model"""
+    try:
+        if groq_service.usage is not None:
+            # Include rows still waiting in the write-behind buffer
+            await groq_service.usage.flush()
+        return await usage_repo.get_usage_summary(group_by, date_from, date_to, client_id, model)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/usage/stats")
+async def get_usage_recorder_stats():
+    """Write-behind buffer counters for usage accounting"""
+    if groq_service.usage is None:
+        return {"enabled": False}
+    return {"enabled": True, **groq_service.usage.stats()}
+
+@router.post("/conversations", response_model=ConversationCreateResponse)
+async def create_conversation(conversations_repo=Depends(get_conversations_repo)):
+    """Start a server-side conversation; later turns send only the new user input"""
+    try:
+        conversation_id = await conversations_repo.create_conversation(DEFAULT_USERNAME)
+        return ConversationCreateResponse(conversation_id=conversation_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/conversations/{conversation_id}", response_model=Conversation)
+async def get_conversation(conversation_id: str, conversations_repo=Depends(get_conversations_repo)):
+    try:
+        messages = await conversations_repo.get_messages(conversation_id, DEFAULT_USERNAME)
+        if messages is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        return Conversation(conversation_id=conversation_id, messages=messages)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/conversations/{conversation_id}/messages", response_model=ConversationTurnResponse)
+async def send_conversation_message(
+    conversation_id: str,
+    request: ConversationTurnRequest,
+    conversations_repo=Depends(get_conversations_repo),
+    clients_repo=Depends(get_clients_repo),
+    plans_repo=Depends(get_plans_repo)
+):
+    """Send one turn of a stored conversation; only the new assistant reply is returned"""
+    try:
+        if not request.user_input.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User input cannot be empty"
+            )
+        
+        context = await _client_context(request.client_id, clients_repo, plans_repo)
+        history = await conversations_repo.get_messages(conversation_id, DEFAULT_USERNAME)
+        if history is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        
+        chat_response = await groq_service.send_message(
+            ChatRequest(user_input=request.user_input, conversation_history=history, client_id=request.client_id),
+            flow="conversation",
+            context=context
+        )
+        await conversations_repo.append_messages(conversation_id, [
+            ChatMessage(role="user", content=request.user_input),
+            ChatMessage(role="assistant", content=chat_response.response)
+        ])
+        return ConversationTurnResponse(
+            conversation_id=conversation_id,
+            response=chat_response.response,
+            usage=chat_response.usage
+        )
+    except HTTPException:
+        raise
+    except GroqServiceError as e:
+        raise _upstream_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Chat service error: {str(e)}"
+        )
+
+@router.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str, conversations_repo=Depends(get_conversations_repo)):
+    try:
+        success = await conversations_repo.delete_conversation(conversation_id, DEFAULT_USERNAME)
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        return {"message": "deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
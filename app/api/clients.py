@@ -1,21 +1,26 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.models.client import Client, ClientCreate, ClientUpdate, ClientResponse
-from app.services.repositories.clients_repo_railway import ClientsRepositoryRailway
-from app.services.db_railway import get_db
+from typing import List, Optional
+from app.models.client import Client, ClientCreate, ClientUpdate, ClientResponse, ClientListItem
+from app.services.repositories.clients_repo_railway import (
+    ClientsRepositoryRailway, CLIENT_SORT_KEYS, CLIENT_LIST_FIELDS, parse_clients_cursor
+)
+from app.services.repositories.clients_repo_railway_async import ClientsRepositoryRailwayAsync
+from app.services.db_railway import get_db, repository_dependency
+from app.services.repositories.cursors import encode_cursor, decode_cursor
 
 router = APIRouter()
 
+get_clients_repo = repository_dependency(ClientsRepositoryRailway, ClientsRepositoryRailwayAsync)
+
 # Default username for single-user system
 DEFAULT_USERNAME = "admin"
 
 @router.post("/", response_model=ClientResponse)
-async def create_client(client_data: ClientCreate, db: Session = Depends(get_db)):
+async def create_client(client_data: ClientCreate, clients_repo=Depends(get_clients_repo)):
     try:
         print(f"Creating client with data: {client_data}")
-        clients_repo = ClientsRepositoryRailway(db)
-        client_id = clients_repo.create_client(DEFAULT_USERNAME, client_data)
+        client_id = await clients_repo.create_client(DEFAULT_USERNAME, client_data)
         print(f"Client created with ID: {client_id}")
         response = ClientResponse(client_id=client_id)
         print(f"Returning response: {response}")
@@ -27,11 +32,48 @@ async def create_client(client_data: ClientCreate, db: Session = Depends(get_db)
             detail=str(e)
         )
 
-@router.get("/", response_model=List[Client])
-async def get_clients(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[ClientListItem], response_model_exclude_unset=True)
+async def get_clients(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list every client"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
+    sort: str = Query("name", description="name, created_at or updated_at; prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (client_id is always included)"),
+    clients_repo=Depends(get_clients_repo)
+):
     try:
-        clients_repo = ClientsRepositoryRailway(db)
-        return clients_repo.get_clients(DEFAULT_USERNAME)
+        descending = sort.startswith("-")
+        sort_key = sort.lstrip("-")
+        if sort_key not in CLIENT_SORT_KEYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort must be one of: {', '.join(CLIENT_SORT_KEYS)}"
+            )
+        
+        selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(CLIENT_LIST_FIELDS)
+        unknown = [f for f in selected if f not in CLIENT_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        
+        try:
+            after = parse_clients_cursor(decode_cursor(cursor, 2), sort_key) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        clients, next_key = await clients_repo.get_clients_page(
+            DEFAULT_USERNAME, sort_key, descending, limit, selected, after
+        )
+        if next_key:
+            response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+        return clients
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -67,10 +109,9 @@ async def test_database(db: Session = Depends(get_db)):
         return {"status": "error", "message": str(e)}
 
 @router.get("/{client_id}", response_model=Client)
-async def get_client(client_id: str, db: Session = Depends(get_db)):
+async def get_client(client_id: str, clients_repo=Depends(get_clients_repo)):
     try:
-        clients_repo = ClientsRepositoryRailway(db)
-        client = clients_repo.get_client(client_id, DEFAULT_USERNAME)
+        client = await clients_repo.get_client(client_id, DEFAULT_USERNAME)
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -86,10 +127,9 @@ async def get_client(client_id: str, db: Session = Depends(get_db)):
         )
 
 @router.put("/{client_id}")
-async def update_client(client_id: str, updates: ClientUpdate, db: Session = Depends(get_db)):
+async def update_client(client_id: str, updates: ClientUpdate, clients_repo=Depends(get_clients_repo)):
     try:
-        clients_repo = ClientsRepositoryRailway(db)
-        success = clients_repo.update_client(client_id, DEFAULT_USERNAME, updates)
+        success = await clients_repo.update_client(client_id, DEFAULT_USERNAME, updates)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -105,10 +145,9 @@ async def update_client(client_id: str, updates: ClientUpdate, db: Session = Dep
         )
 
 @router.delete("/{client_id}")
-async def delete_client(client_id: str, db: Session = Depends(get_db)):
+async def delete_client(client_id: str, clients_repo=Depends(get_clients_repo)):
     try:
-        clients_repo = ClientsRepositoryRailway(db)
-        success = clients_repo.delete_client(client_id, DEFAULT_USERNAME)
+        success = await clients_repo.delete_client(client_id, DEFAULT_USERNAME)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
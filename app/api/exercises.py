@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, status, Query, Depends
+from typing import List, Optional
+from app.models.exercise import Exercise, ExerciseUse
+from app.services.exercise_index import exercise_index
+from app.services.repositories.exercises_repo_railway import ExercisesRepositoryRailway
+from app.services.repositories.exercises_repo_railway_async import ExercisesRepositoryRailwayAsync
+from app.services.db_railway import repository_dependency
+
+router = APIRouter()
+
+get_exercises_repo = repository_dependency(ExercisesRepositoryRailway, ExercisesRepositoryRailwayAsync)
+
+# Default username for single-user system
+DEFAULT_USERNAME = "admin"
+
+@router.get("/suggest", response_model=List[Exercise])
+async def suggest_exercises(
+    q: str = Query(..., min_length=1, description="Start of any word of the exercise name"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Autocomplete from the in-memory exercise index; no database round-trip"""
+    return [Exercise(id=exercise_id, name=name) for exercise_id, name in exercise_index.suggest(q, limit)]
+
+@router.get("/stats")
+async def get_exercise_index_stats():
+    return exercise_index.stats()
+
+@router.get("/{exercise_id}/plans", response_model=List[ExerciseUse])
+async def get_exercise_uses(
+    exercise_id: int,
+    week_from: Optional[str] = Query(None, alias="from", description="First week (YYYY-MM-DD), inclusive"),
+    week_to: Optional[str] = Query(None, alias="to", description="Last week (YYYY-MM-DD), inclusive"),
+    limit: int = Query(100, ge=1, le=1000),
+    exercises_repo=Depends(get_exercises_repo)
+):
+    """Client weeks whose plan includes the exercise, newest first"""
+    try:
+        exercise = await exercises_repo.get_exercise(exercise_id)
+        if not exercise:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exercise not found"
+            )
+        return await exercises_repo.get_exercise_uses(exercise_id, DEFAULT_USERNAME, week_from, week_to, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
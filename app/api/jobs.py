@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional
+from app.models.job import JobStatus
+from app.services.job_runner import job_runner
+
+router = APIRouter()
+
+# Default username for single-user system
+DEFAULT_USERNAME = "admin"
+
+@router.get("/", response_model=List[JobStatus])
+async def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Most recent jobs, newest first"""
+    try:
+        return await job_runner.list_jobs(DEFAULT_USERNAME, status_filter, kind, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/stats")
+async def get_job_runner_stats():
+    """Worker counts and outcome counters for this process's job runner"""
+    return job_runner.stats()
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    try:
+        job = await job_runner.get(job_id, DEFAULT_USERNAME)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one (its status turns "cancelled" once it has stopped)"""
+    try:
+        job_status = await job_runner.cancel(job_id, DEFAULT_USERNAME)
+        if job_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        if job_status not in ("cancelled", "running"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job already {job_status}"
+            )
+        return {"message": "cancelled" if job_status == "cancelled" else "cancelling"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -1,18 +1,87 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Response
 from sqlalchemy.orm import Session
-from app.models.plan import WeekPlan
-from app.services.repositories.plans_repo_railway import PlansRepositoryRailway
-from app.services.db_railway import get_db
+from typing import List, Optional, Tuple, Union
+from app.models.plan import WeekPlan, WeekPlanPatch, WeekVolume, PlanTemplateApply, PlanGenerationRequest, PlanGenerationJob
+from app.core.config import settings
+from app.services.plan_generation import JOB_KIND, submit_plan_generation, plan_generation_status
+from app.services.job_runner import job_runner
+from app.services.repositories.plans_repo_railway import PlansRepositoryRailway, PlanPatchConflict
+from app.services.repositories.plans_repo_railway_async import PlansRepositoryRailwayAsync
+from app.services.repositories.clients_repo_railway import ClientsRepositoryRailway
+from app.services.repositories.clients_repo_railway_async import ClientsRepositoryRailwayAsync
+from app.services.db_railway import repository_dependency
 
 router = APIRouter()
 
-@router.get("/weeks/{client_id}", response_model=WeekPlan)
+get_plans_repo = repository_dependency(PlansRepositoryRailway, PlansRepositoryRailwayAsync)
+get_clients_repo = repository_dependency(ClientsRepositoryRailway, ClientsRepositoryRailwayAsync)
+
+# Default username for single-user system
+DEFAULT_USERNAME = "admin"
+
+# Limits for range fetches: a year of weeks, and clients per multi-client request
+MAX_WEEK_RANGE = 53
+MAX_CLIENTS_PER_FETCH = 100
+
+# Clients per template application (one transaction)
+MAX_CLIENTS_PER_TEMPLATE = 500
+
+def _week_range(offset_from: Optional[int], offset_to: Optional[int]) -> Tuple[int, int]:
+    """Resolve from/to week offsets (a missing bound means the current week)"""
+    offset_from = 0 if offset_from is None else offset_from
+    offset_to = 0 if offset_to is None else offset_to
+    if offset_from > offset_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'"
+        )
+    if offset_to - offset_from + 1 > MAX_WEEK_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_WEEK_RANGE} weeks per request"
+        )
+    return offset_from, offset_to
+
+@router.get("/weeks", response_model=List[WeekPlan])
+async def get_week_plans(
+    client_ids: List[str] = Query(..., description="Clients to fetch; repeat the parameter for each"),
+    offset_from: Optional[int] = Query(None, alias="from", description="First week offset, e.g. -11"),
+    offset_to: Optional[int] = Query(None, alias="to", description="Last week offset, inclusive"),
+    plans_repo=Depends(get_plans_repo)
+):
+    """Week plans for several clients over a range of weeks, client by client, oldest week first"""
+    try:
+        if len(client_ids) > MAX_CLIENTS_PER_FETCH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_CLIENTS_PER_FETCH} clients per request"
+            )
+        offset_from, offset_to = _week_range(offset_from, offset_to)
+        content = await plans_repo.get_week_plans_json(list(dict.fromkeys(client_ids)), offset_from, offset_to)
+        return Response(content=content, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/weeks/{client_id}", response_model=Union[WeekPlan, List[WeekPlan]])
 async def get_week_plan(
     client_id: str,
     weekOffset: int = Query(0, description="Week offset: 0 for current week, 1 for next week"),
-    db: Session = Depends(get_db)
+    offset_from: Optional[int] = Query(None, alias="from", description="First week offset of a range, e.g. -11"),
+    offset_to: Optional[int] = Query(None, alias="to", description="Last week offset of a range, inclusive"),
+    plans_repo=Depends(get_plans_repo)
 ):
+    """One week's plan, or with from/to a list of plans for that range, oldest first"""
     try:
+        if offset_from is not None or offset_to is not None:
+            offset_from, offset_to = _week_range(offset_from, offset_to)
+            content = await plans_repo.get_week_plans_json([client_id], offset_from, offset_to)
+            return Response(content=content, media_type="application/json")
+        
         # Validate week offset
         if weekOffset not in [0, 1]:
             raise HTTPException(
@@ -20,8 +89,11 @@ async def get_week_plan(
                 detail="Week offset must be 0 (current week) or 1 (next week)"
             )
         
-        plans_repo = PlansRepositoryRailway(db)
-        return plans_repo.get_week_plan(client_id, weekOffset)
+        # Stored plans were validated on write; send them without re-validating
+        return Response(
+            content=await plans_repo.get_week_plan_json(client_id, weekOffset),
+            media_type="application/json"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -34,7 +106,7 @@ async def get_week_plan(
 async def save_week_plan(
     client_id: str,
     plan: WeekPlan,
-    db: Session = Depends(get_db)
+    plans_repo=Depends(get_plans_repo)
 ):
     try:
         # Ensure the client_id in the URL matches the plan
@@ -44,8 +116,7 @@ async def save_week_plan(
                 detail="Client ID in URL must match client ID in plan"
             )
         
-        plans_repo = PlansRepositoryRailway(db)
-        success = plans_repo.save_week_plan(plan)
+        success = await plans_repo.save_week_plan(plan)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -60,3 +131,152 @@ async def save_week_plan(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+@router.patch("/weeks/{client_id}")
+async def patch_week_plan(
+    client_id: str,
+    patch: WeekPlanPatch,
+    plans_repo=Depends(get_plans_repo)
+):
+    """Replace single days and/or change fields of single workouts in a saved plan"""
+    try:
+        if not patch.days and not patch.workouts:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Patch must contain days or workout edits"
+            )
+        
+        success = await plans_repo.patch_week_plan(client_id, patch.week_start_iso, patch)
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Week plan, day or workout not found"
+            )
+        
+        return {"message": "saved"}
+    except HTTPException:
+        raise
+    except PlanPatchConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/templates/apply")
+async def apply_plan_template(
+    request: PlanTemplateApply,
+    plans_repo=Depends(get_plans_repo),
+    clients_repo=Depends(get_clients_repo)
+):
+    """Give many clients the same week plan, from the request or from one client's saved plan.
+
+    The plan body is stored once; each client gets a row pointing at it,
+    replacing whatever plan they had for that week.
+    """
+    try:
+        if (request.days is None) == (request.source_client_id is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Give either days or source_client_id"
+            )
+        client_ids = list(dict.fromkeys(request.client_ids))
+        if len(client_ids) > MAX_CLIENTS_PER_TEMPLATE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_CLIENTS_PER_TEMPLATE} clients per request"
+            )
+        found = {client.client_id for client in await clients_repo.get_clients_by_ids(DEFAULT_USERNAME, client_ids)}
+        missing = [client_id for client_id in client_ids if client_id not in found]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Clients not found: {', '.join(missing)}"
+            )
+        
+        if request.days is not None:
+            plan_data = {'days': [day.dict() for day in request.days]}
+            saved = await plans_repo.apply_plan_template(client_ids, request.week_start_iso, plan_data)
+        else:
+            saved = await plans_repo.copy_week_plan(
+                request.source_client_id,
+                request.source_week_start_iso or request.week_start_iso,
+                client_ids,
+                request.week_start_iso
+            )
+            if saved is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Template plan not found"
+                )
+        
+        return {"message": "saved", "saved": saved}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/analytics/{client_id}", response_model=List[WeekVolume])
+async def get_plan_analytics(
+    client_id: str,
+    offset_from: Optional[int] = Query(None, alias="from", description="First week offset, e.g. -11"),
+    offset_to: Optional[int] = Query(None, alias="to", description="Last week offset, inclusive"),
+    plans_repo=Depends(get_plans_repo)
+):
+    """Planned sets and reps per week, in total and per exercise, oldest week first.
+
+    Read from volume rows kept up to date on every plan save, so the cost
+    depends on the weeks requested, not on the stored plans.
+    """
+    try:
+        offset_from, offset_to = _week_range(offset_from, offset_to)
+        return await plans_repo.get_week_volumes(client_id, offset_from, offset_to)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/generate", response_model=PlanGenerationJob, status_code=status.HTTP_202_ACCEPTED)
+async def generate_week_plans(request: PlanGenerationRequest):
+    """Start drafting week plans for many clients; poll GET /plans/generate/{job_id} for progress"""
+    if len(request.client_ids) > settings.PLAN_GENERATION_MAX_CLIENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PLAN_GENERATION_MAX_CLIENTS} clients per job"
+        )
+    try:
+        job_id = await submit_plan_generation(DEFAULT_USERNAME, request.client_ids, request.week_offset)
+        return plan_generation_status(await job_runner.get(job_id))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/generate/{job_id}", response_model=PlanGenerationJob)
+async def get_generation_job(job_id: str):
+    try:
+        job = await job_runner.get(job_id, DEFAULT_USERNAME)
+        if not job or job.kind != JOB_KIND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        return plan_generation_status(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -1,20 +1,24 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
-from app.models.session import Session, SessionCreate, SessionUpdate, SessionResponse
+from typing import List, Optional
+from datetime import date as date_type
+from app.models.session import Session, SessionCreate, SessionUpdate, SessionResponse, SessionPage
 from app.services.repositories.sessions_repo_railway import SessionsRepositoryRailway
-from app.services.db_railway import get_db
+from app.services.repositories.sessions_repo_railway_async import SessionsRepositoryRailwayAsync
+from app.services.db_railway import repository_dependency
+from app.services.repositories.cursors import encode_cursor, decode_cursor
 
 router = APIRouter()
 
+get_sessions_repo = repository_dependency(SessionsRepositoryRailway, SessionsRepositoryRailwayAsync)
+
 # Default username for single-user system
 DEFAULT_USERNAME = "admin"
 
 @router.post("/", response_model=SessionResponse)
-async def create_session(session_data: SessionCreate, db: Session = Depends(get_db)):
+async def create_session(session_data: SessionCreate, sessions_repo=Depends(get_sessions_repo)):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        session_id = sessions_repo.create_session(DEFAULT_USERNAME, session_data)
+        session_id = await sessions_repo.create_session(DEFAULT_USERNAME, session_data)
         return SessionResponse(session_id=session_id)
     except Exception as e:
         raise HTTPException(
@@ -23,10 +27,9 @@ async def create_session(session_data: SessionCreate, db: Session = Depends(get_
         )
 
 @router.get("/today", response_model=List[Session])
-async def get_today_sessions(db: Session = Depends(get_db)):
+async def get_today_sessions(sessions_repo=Depends(get_sessions_repo)):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        return sessions_repo.get_today_sessions(DEFAULT_USERNAME)
+        return await sessions_repo.get_today_sessions(DEFAULT_USERNAME)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -34,10 +37,45 @@ async def get_today_sessions(db: Session = Depends(get_db)):
         )
 
 @router.get("/date/{date}", response_model=List[Session])
-async def get_sessions_by_date(date: str, db: Session = Depends(get_db)):
+async def get_sessions_by_date(date: str, sessions_repo=Depends(get_sessions_repo)):
+    try:
+        return await sessions_repo.get_sessions_by_date(DEFAULT_USERNAME, date)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/range", response_model=SessionPage)
+async def get_sessions_in_range(
+    date_from: str = Query(..., alias="from", description="First date (YYYY-MM-DD), inclusive"),
+    date_to: str = Query(..., alias="to", description="Last date (YYYY-MM-DD), inclusive"),
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    client_id: Optional[str] = None,
+    sessions_repo=Depends(get_sessions_repo)
+):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        return sessions_repo.get_sessions_by_date(DEFAULT_USERNAME, date)
+        try:
+            if date_type.fromisoformat(date_from) > date_type.fromisoformat(date_to):
+                raise ValueError("'from' must not be after 'to'")
+            after = decode_cursor(cursor, 3) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        sessions, next_key = await sessions_repo.get_sessions_in_range(
+            DEFAULT_USERNAME, date_from, date_to, limit, after, status_filter, client_id
+        )
+        return SessionPage(
+            sessions=sessions,
+            next_cursor=encode_cursor(next_key) if next_key else None
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -45,10 +83,9 @@ async def get_sessions_by_date(date: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/{session_id}", response_model=Session)
-async def get_session(session_id: str, db: Session = Depends(get_db)):
+async def get_session(session_id: str, sessions_repo=Depends(get_sessions_repo)):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        session = sessions_repo.get_session(session_id, DEFAULT_USERNAME)
+        session = await sessions_repo.get_session(session_id, DEFAULT_USERNAME)
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -64,10 +101,9 @@ async def get_session(session_id: str, db: Session = Depends(get_db)):
         )
 
 @router.put("/{session_id}")
-async def update_session(session_id: str, updates: SessionUpdate, db: Session = Depends(get_db)):
+async def update_session(session_id: str, updates: SessionUpdate, sessions_repo=Depends(get_sessions_repo)):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        success = sessions_repo.update_session(session_id, DEFAULT_USERNAME, updates)
+        success = await sessions_repo.update_session(session_id, DEFAULT_USERNAME, updates)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -83,10 +119,9 @@ async def update_session(session_id: str, updates: SessionUpdate, db: Session =
         )
 
 @router.delete("/{session_id}")
-async def delete_session(session_id: str, db: Session = Depends(get_db)):
+async def delete_session(session_id: str, sessions_repo=Depends(get_sessions_repo)):
     try:
-        sessions_repo = SessionsRepositoryRailway(db)
-        success = sessions_repo.delete_session(session_id, DEFAULT_USERNAME)
+        success = await sessions_repo.delete_session(session_id, DEFAULT_USERNAME)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
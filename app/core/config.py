@@ -28,11 +28,91 @@ class Settings(BaseSettings):
     
     # Database Settings (Railway PostgreSQL)
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./ai_coach.db")
+    # Run SQL routes on the async engine (asyncpg for Postgres, aiosqlite for SQLite)
+    DATABASE_ASYNC: bool = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+    
+    # Connection pool (per engine, per worker)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; replace connections before idle resets
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DB_POOL_STATS_INTERVAL: int = int(os.getenv("DB_POOL_STATS_INTERVAL", "300"))  # seconds; 0 disables the log line
     
     # Groq API
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama3-8b-8192")
     
+    # Groq HTTP connection pool (shared keep-alive client for the whole worker)
+    GROQ_MAX_CONNECTIONS: int = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    GROQ_KEEPALIVE_EXPIRY: float = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))  # seconds
+    GROQ_CONNECT_TIMEOUT: float = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))  # seconds
+    GROQ_TIMEOUT: float = float(os.getenv("GROQ_TIMEOUT", "60"))  # seconds per read/write
+    
+    # Groq admission control: concurrency limit, retries with backoff, circuit breaker per model
+    GROQ_MAX_CONCURRENCY: int = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+    GROQ_QUEUE_TIMEOUT: float = float(os.getenv("GROQ_QUEUE_TIMEOUT", "10"))  # seconds to wait for a slot
+    GROQ_MAX_RETRIES: int = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+    GROQ_RETRY_BASE_DELAY: float = float(os.getenv("GROQ_RETRY_BASE_DELAY", "0.5"))  # seconds
+    GROQ_RETRY_MAX_DELAY: float = float(os.getenv("GROQ_RETRY_MAX_DELAY", "8"))  # seconds
+    GROQ_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("GROQ_BREAKER_FAILURE_THRESHOLD", "5"))  # calls failing after all retries
+    GROQ_BREAKER_RESET_TIMEOUT: float = float(os.getenv("GROQ_BREAKER_RESET_TIMEOUT", "30"))  # seconds open before probing
+    
+    # Model routing: "model[:timeout_seconds],..." per tier, each defaulting to GROQ_MODEL
+    GROQ_FAST_MODELS: str = os.getenv("GROQ_FAST_MODELS", "")  # short factual questions
+    GROQ_LARGE_MODELS: str = os.getenv("GROQ_LARGE_MODELS", "")  # plan generation and long prompts
+    GROQ_FAST_MAX_INPUT_TOKENS: int = int(os.getenv("GROQ_FAST_MAX_INPUT_TOKENS", "200"))
+    GROQ_MODEL_COOLDOWN: float = float(os.getenv("GROQ_MODEL_COOLDOWN", "30"))  # seconds a failing model is avoided
+    
+    # Exact-match chat response cache ("memory" per worker, "sqlite" shared on the host)
+    CHAT_CACHE_ENABLED: bool = os.getenv("CHAT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    CHAT_CACHE_BACKEND: str = os.getenv("CHAT_CACHE_BACKEND", "memory")
+    CHAT_CACHE_MAX_ENTRIES: int = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024"))
+    CHAT_CACHE_TTL: float = float(os.getenv("CHAT_CACHE_TTL", "3600"))  # seconds
+    CHAT_CACHE_PATH: str = os.getenv("CHAT_CACHE_PATH", "./chat_cache.db")
+    
+    # Coalesce identical in-flight chat requests into one Groq call
+    CHAT_SINGLE_FLIGHT_ENABLED: bool = os.getenv("CHAT_SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+    CHAT_SINGLE_FLIGHT_TIMEOUT: float = float(os.getenv("CHAT_SINGLE_FLIGHT_TIMEOUT", "90"))  # seconds each waiter waits
+    
+    # Prompt history compaction (older turns are replaced by a cached rolling summary)
+    CHAT_HISTORY_COMPACTION_ENABLED: bool = os.getenv("CHAT_HISTORY_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+    CHAT_HISTORY_TOKEN_BUDGET: int = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "6000"))  # prompt tokens; completion uses the rest of 8k
+    CHAT_HISTORY_SUMMARY_TOKENS: int = int(os.getenv("CHAT_HISTORY_SUMMARY_TOKENS", "300"))
+    CHAT_HISTORY_COMPACT_CHUNK: int = int(os.getenv("CHAT_HISTORY_COMPACT_CHUNK", "8"))  # messages summarized at a time
+    
+    # Client context blocks kept per worker for client-aware chat
+    CHAT_CLIENT_CONTEXT_CACHE_ENTRIES: int = int(os.getenv("CHAT_CLIENT_CONTEXT_CACHE_ENTRIES", "512"))
+    
+    # Bulk week-plan generation (POST /plans/generate)
+    PLAN_GENERATION_CONCURRENCY: int = int(os.getenv("PLAN_GENERATION_CONCURRENCY", "4"))  # Groq calls in flight per job
+    PLAN_GENERATION_SAVE_BATCH: int = int(os.getenv("PLAN_GENERATION_SAVE_BATCH", "20"))  # plans saved per transaction
+    PLAN_GENERATION_MAX_CLIENTS: int = int(os.getenv("PLAN_GENERATION_MAX_CLIENTS", "500"))
+    
+    # Plan storage format for new writes: json, msgpack, json+zstd or msgpack+zstd
+    PLAN_STORAGE_CODEC: str = os.getenv("PLAN_STORAGE_CODEC", "json")
+    PLAN_STORAGE_ZSTD_LEVEL: int = int(os.getenv("PLAN_STORAGE_ZSTD_LEVEL", "3"))
+    # Store each distinct plan body once (plan_bodies) and point plans at it by hash;
+    # applied templates share a body either way
+    PLAN_STORAGE_DEDUPE: bool = os.getenv("PLAN_STORAGE_DEDUPE", "false").lower() in ("1", "true", "yes")
+    
+    # Background job runner (jobs table)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # asyncio workers per app process
+    JOB_PROCESS_WORKERS: int = int(os.getenv("JOB_PROCESS_WORKERS", "0"))  # processes for CPU-bound jobs; 0 = thread pool
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # seconds between checks for due jobs
+    JOB_RETRY_BASE_DELAY: float = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))  # doubled per failed attempt
+    JOB_HEARTBEAT_INTERVAL: float = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+    JOB_STALE_AFTER: float = float(os.getenv("JOB_STALE_AFTER", "60"))  # re-queue running jobs silent this long
+    JOB_DRAIN_TIMEOUT: float = float(os.getenv("JOB_DRAIN_TIMEOUT", "20"))  # seconds running jobs get at shutdown
+    JOB_PROGRESS_INTERVAL: float = float(os.getenv("JOB_PROGRESS_INTERVAL", "1"))  # min seconds between progress writes
+    
+    # Token usage accounting (buffered in memory, written to chat_usage in batches)
+    CHAT_USAGE_ENABLED: bool = os.getenv("CHAT_USAGE_ENABLED", "true").lower() in ("1", "true", "yes")
+    CHAT_USAGE_FLUSH_INTERVAL: float = float(os.getenv("CHAT_USAGE_FLUSH_INTERVAL", "5"))  # seconds between batch writes
+    CHAT_USAGE_BATCH_SIZE: int = int(os.getenv("CHAT_USAGE_BATCH_SIZE", "200"))  # flush early once this many are buffered
+    CHAT_USAGE_MAX_BUFFER: int = int(os.getenv("CHAT_USAGE_MAX_BUFFER", "10000"))  # rows kept while the database is unreachable
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
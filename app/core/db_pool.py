@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from .config import settings
+
+class PoolWaitStats:
+    """Thread-safe checkout wait-time counters for one connection pool"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self, reset_max: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            avg = self.total_wait / self.checkouts if self.checkouts else 0.0
+            data = {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(avg * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+            if reset_max:
+                self.max_wait = 0.0
+            return data
+
+class _TimedCheckoutMixin:
+    """Record how long each checkout waited for a pooled (or new) connection"""
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+def engine_pool_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine keyword arguments for the pool configured in Settings"""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[1] in ("", "/")):
+        # In-memory SQLite must keep its single shared connection
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+def pool_status(pool, reset_max: bool = False) -> Optional[Dict[str, Any]]:
+    """Current occupancy and checkout wait times for an engine's pool"""
+    if not isinstance(pool, QueuePool):
+        return None
+
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.snapshot(reset_max=reset_max))
+    return status
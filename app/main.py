@@ -1,8 +1,14 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.services.db_railway import db_service
-from app.api import clients, plans, chat, sessions
+from app.services.db_railway import db_service, call_repository
+from app.services.groq_client import groq_service
+from app.services.job_runner import job_runner
+from app.services.exercise_index import exercise_index
+from app.services.repositories.exercises_repo_railway import ExercisesRepositoryRailway
+from app.services.repositories.exercises_repo_railway_async import ExercisesRepositoryRailwayAsync
+from app.api import clients, plans, chat, sessions, jobs, exercises
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -24,6 +30,8 @@ app.include_router(clients.router, prefix="/clients", tags=["clients"])
 app.include_router(plans.router, prefix="/plans", tags=["plans"])
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+app.include_router(exercises.router, prefix="/exercises", tags=["exercises"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -33,15 +41,43 @@ async def startup_event():
         print("Database tables initialized successfully")
     except Exception as e:
         print(f"Error initializing database: {e}")
+    
+    try:
+        exercise_index.load(await call_repository(
+            ExercisesRepositoryRailway, ExercisesRepositoryRailwayAsync, "list_exercises"
+        ))
+    except Exception as e:
+        print(f"Error loading exercise index: {e}")
+    
+    await groq_service.start()
+    await job_runner.start()
+    
+    app.state.pool_stats_task = None
+    if settings.DB_POOL_STATS_INTERVAL > 0:
+        app.state.pool_stats_task = asyncio.create_task(
+            db_service.log_pool_stats(settings.DB_POOL_STATS_INTERVAL)
+        )
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
+    if app.state.pool_stats_task is not None:
+        app.state.pool_stats_task.cancel()
+    
+    # Let running jobs finish (or re-queue them) before the pools they use go away
+    await job_runner.close()
+    
     try:
         db_service.close()
+        await db_service.close_async()
         print("Database connection closed")
     except Exception as e:
         print(f"Error closing database: {e}")
+    
+    try:
+        await groq_service.close()
+    except Exception as e:
+        print(f"Error closing Groq client: {e}")
 
 @app.get("/")
 async def root():
@@ -55,6 +91,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/internal/db-pool")
+async def db_pool_stats():
+    """Connection pool occupancy and checkout wait times for tuning pool settings"""
+    return db_service.pool_stats()
+
 @app.post("/reset-database")
 async def reset_database():
     """Reset database tables (WARNING: This will delete all data)"""
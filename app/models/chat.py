@@ -8,8 +8,33 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     user_input: str
     conversation_history: Optional[List[ChatMessage]] = []
+    client_id: Optional[str] = None  # adds the client's profile and current plan to the prompt
 
 class ChatResponse(BaseModel):
     response: str
     conversation_history: List[ChatMessage]
     usage: Optional[dict] = None
+
+class ConversationCreateResponse(BaseModel):
+    conversation_id: str
+
+class ConversationTurnRequest(BaseModel):
+    user_input: str
+    client_id: Optional[str] = None
+
+class ConversationTurnResponse(BaseModel):
+    conversation_id: str
+    response: str
+    usage: Optional[dict] = None
+
+class Conversation(BaseModel):
+    conversation_id: str
+    messages: List[ChatMessage]
+
+class UsageSummary(BaseModel):
+    key: Optional[str]  # day (YYYY-MM-DD), client_id or model, depending on the grouping
+    requests: int
+    cache_hits: int
+    tokens_in: int  # upstream tokens only; cache hits cost nothing
+    tokens_out: int
+    avg_latency_ms: float
@@ -38,3 +38,20 @@ class Client(ClientBase):
 
 class ClientResponse(BaseModel):
     client_id: str
+
+class ClientListItem(BaseModel):
+    """Client projection for GET /clients; only the requested fields are set"""
+    client_id: str
+    name: Optional[str] = None
+    age: Optional[int] = None
+    sex: Optional[str] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+    activity_level: Optional[str] = None
+    goals: Optional[str] = None
+    bmr: Optional[int] = None
+    tdee: Optional[int] = None
+    calorie_maintenance: Optional[int] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
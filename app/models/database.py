@@ -1,18 +1,48 @@
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean
+from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, Index, LargeBinary
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
+from app.core.config import settings
+from app.core.db_pool import engine_pool_options
 import os
 
 # Database URL from environment variable (Railway will provide this)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_coach.db")
 
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_pool_options(DATABASE_URL))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver"""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+# Async engine and session factory (only when DATABASE_ASYNC is enabled)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_pool_options(ASYNC_DATABASE_URL, is_async=True))
+    # expire_on_commit=False so committed rows can still be serialized without lazy IO
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; bind datetimes in the
+# same format so keyset comparisons against server-generated values are exact
+SortableTimestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -51,8 +81,17 @@ class Client(Base):
     tdee = Column(Integer)
     calorie_maintenance = Column(Integer)
     notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(SortableTimestamp, server_default=func.now())
+    # default as well as server_default: tables created before updated_at had a
+    # server default keep getting a value on insert
+    updated_at = Column(SortableTimestamp, default=func.now(), server_default=func.now(), onupdate=func.now())
+    
+    # Keyset pagination indexes for GET /clients sort keys
+    __table_args__ = (
+        Index("ix_clients_username_name", "username", "name", "client_id"),
+        Index("ix_clients_username_created_at", "username", "created_at", "client_id"),
+        Index("ix_clients_username_updated_at", "username", "updated_at", "client_id"),
+    )
 
 # Plan model
 class Plan(Base):
@@ -61,9 +100,49 @@ class Plan(Base):
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(String(50), nullable=False, index=True)
     week_start_iso = Column(String(10), nullable=False, index=True)
-    plan_data = Column(Text, nullable=False)  # JSON string
+    plan_data = Column(Text, nullable=False)  # JSON string; "" when the plan is in plan_blob or a shared body
+    plan_blob = Column(LargeBinary, nullable=True)  # version byte + binary plan (see app.models.plan_codec)
+    body_hash = Column(String(64), nullable=True)  # PlanBody holding the plan, when stored deduplicated
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # One plan per client and week; saves upsert against this
+    __table_args__ = (
+        Index("uq_plans_client_id_week_start_iso", "client_id", "week_start_iso", unique=True),
+    )
+
+# Plan body stored once for every plan with the same content (e.g. a template copied across clients)
+class PlanBody(Base):
+    __tablename__ = "plan_bodies"
+    
+    hash = Column(String(64), primary_key=True)  # sha256 of the canonical JSON of the plan data
+    plan_data = Column(Text, nullable=False)  # same encoding as Plan.plan_data / plan_blob
+    plan_blob = Column(LargeBinary, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)  # plans pointing here; deleted at 0
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Exercise catalog (names used in plans, interned once)
+class Exercise(Base):
+    __tablename__ = "exercises"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200), nullable=False)  # as first written
+    name_key = Column(String(200), nullable=False, unique=True)  # normalized: lowercase, single spaces
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Reverse index: which client weeks use an exercise, with its weekly volume (kept in step with plan writes)
+class PlanExercise(Base):
+    __tablename__ = "plan_exercises"
+    
+    exercise_id = Column(Integer, primary_key=True)
+    client_id = Column(String(50), primary_key=True)
+    week_start_iso = Column(String(10), primary_key=True)
+    sets = Column(Integer)  # the exercise's total sets in that week's plan
+    reps = Column(Integer)  # and total reps, sets x reps summed over its workouts
+    
+    __table_args__ = (
+        Index("ix_plan_exercises_client_id_week_start_iso", "client_id", "week_start_iso"),
+    )
 
 # Session model
 class Session(Base):
@@ -71,9 +150,96 @@ class Session(Base):
     
     session_id = Column(String(50), primary_key=True, index=True)
     username = Column(String(50), nullable=False, index=True)
+    # Promoted out of session_data so date lookups are index range scans
+    client_id = Column(String(50), index=True)
+    date = Column(String(10))  # ISO date string
+    time = Column(String(5))  # HH:MM format
+    status = Column(String(20))  # "scheduled", "completed", "cancelled"
     session_data = Column(Text, nullable=False)  # JSON string
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_sessions_username_date_time", "username", "date", "time"),
+    )
+
+# Conversation model (server-side chat history)
+class Conversation(Base):
+    __tablename__ = "conversations"
+    
+    conversation_id = Column(String(50), primary_key=True, index=True)
+    username = Column(String(50), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Conversation message model (one row per chat turn)
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(String(50), nullable=False)
+    role = Column(String(20), nullable=False)  # "user", "assistant"
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
+# Chat usage model (one row per completion or cache hit, written in batches)
+class ChatUsage(Base):
+    __tablename__ = "chat_usage"
+    
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    flow = Column(String(20), nullable=False)  # "chat", "stream", "conversation", "summary"
+    client_id = Column(String(50))
+    model = Column(String(100))
+    tokens_in = Column(Integer, nullable=False, default=0)
+    tokens_out = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    
+    __table_args__ = (
+        Index("ix_chat_usage_created_at", "created_at"),
+        Index("ix_chat_usage_client_id_created_at", "client_id", "created_at"),
+    )
+
+# Background job model (claimed and run by app.services.job_runner)
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    job_id = Column(String(50), primary_key=True, index=True)
+    username = Column(String(50), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False)  # "queued", "running", "succeeded", "failed", "cancelled"
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    payload = Column(Text, nullable=False)  # JSON string
+    progress = Column(Text)  # JSON string
+    result = Column(Text)  # JSON string
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    run_after = Column(DateTime(timezone=True), nullable=False)  # not claimed before this (retry backoff)
+    heartbeat_at = Column(DateTime(timezone=True))  # refreshed by the runner while the job runs
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_jobs_status_priority_run_after", "status", "priority", "run_after"),
+    )
+
+# Data migrations already run against this database (see app.models.migrations)
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# session_data keys mirrored into the indexed Session columns
+SESSION_PROMOTED_FIELDS = ("client_id", "date", "time", "status")
 
 # Create all tables
 def create_tables():
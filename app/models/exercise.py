@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+class Exercise(BaseModel):
+    id: int
+    name: str
+
+class ExerciseUse(BaseModel):
+    client_id: str
+    week_start_iso: str
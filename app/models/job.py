@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # "queued", "running", "succeeded", "failed", "cancelled"
+    priority: int
+    attempts: int
+    max_attempts: int
+    payload: Optional[Any] = None
+    progress: Optional[dict] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
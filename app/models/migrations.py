@@ -0,0 +1,191 @@
+from sqlalchemy import Column, inspect, select, update, delete, bindparam, func
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from app.models.database import engine, Client, Plan, PlanExercise, Session, SchemaMigration, SESSION_PROMOTED_FIELDS
+from app.core.config import settings
+from app.models.plan_codec import plan_codec
+from app.models.plan_statements import (
+    plan_content_query, upsert_statements, plan_body_hash, body_refs_statements,
+    plan_exercise_names, insert_exercises_statements, exercise_ids_query, replace_plan_exercises_statements
+)
+import json
+
+BACKFILL_BATCH_SIZE = 1000
+
+def _add_missing_columns(conn, table, columns):
+    """Add model columns that an older deployment's table does not have yet"""
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    missing = [name for name in columns if name not in existing]
+    if not missing:
+        return []
+
+    op = Operations(MigrationContext.configure(conn))
+    for name in missing:
+        column = table.c[name]
+        op.add_column(table.name, Column(name, column.type, nullable=True))
+    return missing
+
+def _create_missing_indexes(conn, table):
+    """Create indexes declared on the model that create_all skipped for an existing table"""
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+def _applied(conn, name):
+    """Whether the data migration called name already ran against this database"""
+    return conn.execute(
+        select(SchemaMigration.name).where(SchemaMigration.name == name)
+    ).first() is not None
+
+def _record_applied(conn, name):
+    for statement in upsert_statements(conn.dialect.name, SchemaMigration, ["name"], [{"name": name}]):
+        conn.execute(statement)
+
+def migrate_session_columns(conn):
+    """Promote date/time/client/status out of session_data into indexed columns"""
+    table = Session.__table__
+    _add_missing_columns(conn, table, SESSION_PROMOTED_FIELDS)
+    _create_missing_indexes(conn, table)
+
+    # Backfill rows written before the columns existed, paged by session_id
+    # so only one batch of session_data is held at a time
+    stmt = update(table).where(table.c.session_id == bindparam("b_session_id"))
+    last_id = ""
+    while True:
+        rows = conn.execute(
+            select(table.c.session_id, table.c.session_data, table.c.created_at)
+            .where(table.c.date.is_(None), table.c.session_id > last_id)
+            .order_by(table.c.session_id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].session_id
+        params = []
+        for session_id, session_data, created_at in rows:
+            try:
+                data = json.loads(session_data)
+            except (json.JSONDecodeError, TypeError):
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            # Sessions without a date fall back to their creation day ("" if unknown),
+            # so they are not selected and rewritten again on every startup
+            fallback_date = created_at.strftime("%Y-%m-%d") if created_at else ""
+            params.append({
+                "b_session_id": session_id,
+                "client_id": data.get("client_id"),
+                "date": data.get("date") or fallback_date,
+                "time": data.get("time"),
+                "status": data.get("status", "scheduled"),
+            })
+        conn.execute(stmt, params)
+
+def migrate_client_sort_indexes(conn):
+    """Add keyset indexes for client listing and fill updated_at so it can be sorted on"""
+    table = Client.__table__
+    _create_missing_indexes(conn, table)
+    conn.execute(
+        update(table).where(table.c.updated_at.is_(None)).values(updated_at=table.c.created_at)
+    )
+
+def migrate_plan_columns(conn):
+    """Add plan_blob for binary plan storage and body_hash for deduplicated plans"""
+    _add_missing_columns(conn, Plan.__table__, ["plan_blob", "body_hash"])
+
+def migrate_plan_unique_week(conn):
+    """Drop duplicate (client_id, week_start_iso) plans, then add the unique index"""
+    table = Plan.__table__
+    existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+    if "uq_plans_client_id_week_start_iso" in existing:
+        return
+
+    # get_plan_by_week returned the lowest id, so that is the copy later saves kept current
+    keep = select(func.min(table.c.id)).group_by(table.c.client_id, table.c.week_start_iso)
+    removed = conn.execute(delete(table).where(table.c.id.not_in(keep))).rowcount
+    if removed:
+        print(f"Removed {removed} duplicate week plan(s)")
+    _create_missing_indexes(conn, table)
+
+def migrate_plan_exercises(conn):
+    """Fill the exercise catalog, reverse index and weekly volumes from plans saved before they existed"""
+    _add_missing_columns(conn, PlanExercise.__table__, ["sets", "reps"])
+    if _applied(conn, "plan_exercises"):
+        return
+
+    # Paged by id so only one batch of plans is held and decoded at a time
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            plan_content_query(Plan.id, Plan.client_id, Plan.week_start_iso)
+            .where(Plan.id > last_id).order_by(Plan.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        plans = {
+            (row.client_id, row.week_start_iso): plan_codec.decode(row.plan_data, row.plan_blob)
+            for row in rows
+        }
+        names = {}
+        for plan_data in plans.values():
+            names.update(plan_exercise_names(plan_data))
+        if not names:
+            continue
+        for statement in insert_exercises_statements(conn.dialect.name, names):
+            conn.execute(statement)
+        ids = {row.name_key: row.id for row in conn.execute(exercise_ids_query(list(names)))}
+        for statement in replace_plan_exercises_statements(plans, ids):
+            conn.execute(statement)
+    # Later plan writes keep the index current, so the backfill never has to run again
+    _record_applied(conn, "plan_exercises")
+
+def migrate_plan_bodies(conn):
+    """With PLAN_STORAGE_DEDUPE, move plans stored in their own row into shared plan_bodies.
+
+    Rows are kept in their existing encoding. A row rewritten by another
+    process meanwhile (plan_data or plan_blob changed) is left alone, and
+    only the rows actually moved add references to their bodies.
+    """
+    if not settings.PLAN_STORAGE_DEDUPE:
+        return
+
+    # Paged by id so only one batch of plan contents is held at a time
+    moved = 0
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(Plan.id, Plan.plan_data, Plan.plan_blob)
+            .where(Plan.body_hash.is_(None), Plan.id > last_id)
+            .order_by(Plan.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        hashes = [plan_body_hash(plan_codec.decode(row.plan_data, row.plan_blob)) for row in batch]
+        bodies = {body_hash: (row.plan_data, row.plan_blob) for body_hash, row in zip(hashes, batch)}
+        table = Plan.__table__
+        moved_hashes = []
+        for body_hash, row in zip(hashes, batch):
+            stmt = update(table).where(
+                table.c.id == row.id,
+                table.c.body_hash.is_(None),
+                table.c.plan_data == row.plan_data,
+                table.c.plan_blob == row.plan_blob
+            ).values(body_hash=body_hash, plan_data="", plan_blob=None)
+            if conn.execute(stmt).rowcount:
+                moved_hashes.append(body_hash)
+        before, _ = body_refs_statements(conn.dialect.name, bodies, moved_hashes, [])
+        for statement in before:
+            conn.execute(statement)
+        moved += len(moved_hashes)
+    if moved:
+        print(f"Moved {moved} plan(s) into shared plan bodies")
+
+def run_migrations():
+    """Bring tables created by older versions up to the current models"""
+    with engine.begin() as conn:
+        migrate_session_columns(conn)
+        migrate_client_sort_indexes(conn)
+        migrate_plan_columns(conn)
+        migrate_plan_unique_week(conn)
+        migrate_plan_exercises(conn)
+        migrate_plan_bodies(conn)
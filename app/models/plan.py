@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 
 class Workout(BaseModel):
     exercise: str
@@ -16,3 +17,56 @@ class WeekPlan(BaseModel):
     client_id: str
     week_start_iso: str
     days: List[DayPlan]
+
+class WorkoutEdit(BaseModel):
+    day: str  # day the workout belongs to, e.g. "Tue"
+    index: int = Field(..., ge=0)  # position in that day's workouts
+    exercise: Optional[str] = None
+    sets: Optional[int] = None
+    reps: Optional[int] = None
+    rest_sec: Optional[int] = None
+    notes: Optional[str] = None
+
+    def changes(self) -> Dict[str, Any]:
+        """The workout fields this edit sets"""
+        return self.dict(exclude={"day", "index"}, exclude_none=True)
+
+class WeekPlanPatch(BaseModel):
+    week_start_iso: str
+    days: List[DayPlan] = []  # whole days to replace, or add if the plan lacks them
+    workouts: List[WorkoutEdit] = []  # field changes to single workouts, applied after days
+
+class PlanTemplateApply(BaseModel):
+    client_ids: List[str] = Field(..., min_length=1)
+    week_start_iso: str  # week the clients get the template for
+    days: Optional[List[DayPlan]] = None  # the template itself, or ...
+    source_client_id: Optional[str] = None  # ... a client whose saved plan is the template
+    source_week_start_iso: Optional[str] = None  # week of that plan; defaults to week_start_iso
+
+class ExerciseVolume(BaseModel):
+    exercise_id: int
+    name: str
+    sets: int  # total sets in the week
+    reps: int  # total reps in the week (sets x reps per workout)
+
+class WeekVolume(BaseModel):
+    week_start_iso: str
+    sets: int = 0
+    reps: int = 0
+    exercises: List[ExerciseVolume] = []  # highest reps first
+
+class PlanGenerationRequest(BaseModel):
+    client_ids: List[str] = Field(..., min_length=1)
+    week_offset: int = 1  # weeks from the current week; 1 = next week
+
+class PlanGenerationJob(BaseModel):
+    job_id: str
+    status: str  # job status: "queued", "running", "succeeded", "failed", "cancelled"
+    week_start_iso: str
+    total: int
+    generated: int = 0
+    saved: int = 0
+    failed: int = 0
+    errors: Dict[str, str] = {}  # client_id -> reason
+    created_at: datetime
+    finished_at: Optional[datetime] = None
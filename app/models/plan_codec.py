@@ -0,0 +1,104 @@
+import importlib
+import json
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+
+# First byte of a plan_blob: the payload format, plus FLAG_ZSTD when the payload is compressed
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+FLAG_ZSTD = 0x80
+
+# Codec name -> (blob format or None for text in plan_data, zstd-compressed)
+CODECS = {
+    "json": (None, False),
+    "msgpack": (FORMAT_MSGPACK, False),
+    "json+zstd": (FORMAT_JSON, True),
+    "msgpack+zstd": (FORMAT_MSGPACK, True),
+}
+
+# Package to install for each optional module
+_PACKAGES = {"msgpack": "msgpack", "zstandard": "zstandard"}
+
+def _require(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise RuntimeError(
+            f"Stored plans need the {_PACKAGES[module]} package (pip install {_PACKAGES[module]})"
+        ) from None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_json(value: Any) -> str:
+    """Compact JSON, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+def loads_json(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class PlanCodec:
+    """Encode plan data for the plans table and decode whatever a row holds.
+
+    "json" keeps compact JSON text in plan_data. The binary codecs write
+    plan_data as "" and put a version byte plus MessagePack or JSON, optionally
+    zstd-compressed, in plan_blob. Decoding goes by the row, not by the
+    configured codec, so rows written under an earlier setting stay readable.
+    """
+    def __init__(self, name: str, zstd_level: int = 3):
+        if name not in CODECS:
+            raise ValueError(f"Unknown plan storage codec: {name} (choose from {', '.join(CODECS)})")
+        self.name = name
+        self.format, self.compressed = CODECS[name]
+        self.zstd_level = zstd_level
+        # Fail at startup rather than on the first save if a library is missing
+        if self.format == FORMAT_MSGPACK:
+            _require("msgpack")
+        if self.compressed:
+            self._compressor = _require("zstandard").ZstdCompressor(level=zstd_level)
+
+    @property
+    def binary(self) -> bool:
+        return self.format is not None
+
+    def encode(self, plan_data: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+        """Values for the (plan_data, plan_blob) columns"""
+        if not self.binary:
+            return dumps_json(plan_data), None
+        if self.format == FORMAT_MSGPACK:
+            payload = _require("msgpack").packb(plan_data)
+        else:
+            payload = dumps_json(plan_data).encode()
+        version = self.format
+        if self.compressed:
+            payload = self._compressor.compress(payload)
+            version |= FLAG_ZSTD
+        return "", bytes([version]) + payload
+
+    def decode(self, plan_data: Optional[str], plan_blob: Optional[bytes]) -> Dict[str, Any]:
+        if not plan_blob:
+            return loads_json(plan_data) if plan_data else {'days': []}
+        version, payload = plan_blob[0], bytes(plan_blob[1:])
+        if version & FLAG_ZSTD:
+            payload = _require("zstandard").ZstdDecompressor().decompress(payload)
+        plan_format = version & ~FLAG_ZSTD
+        if plan_format == FORMAT_MSGPACK:
+            return _require("msgpack").unpackb(payload)
+        if plan_format == FORMAT_JSON:
+            return loads_json(payload)
+        raise ValueError(f"Unknown stored plan format {version:#04x}")
+
+    def to_json(self, plan_data: Optional[str], plan_blob: Optional[bytes]) -> Optional[str]:
+        """The row's plan as JSON text; text rows are returned as stored, without parsing"""
+        if not plan_blob:
+            return plan_data or None
+        return dumps_json(self.decode(plan_data, plan_blob))
+
+# Global instance
+plan_codec = PlanCodec(settings.PLAN_STORAGE_CODEC, settings.PLAN_STORAGE_ZSTD_LEVEL)
@@ -0,0 +1,185 @@
+from sqlalchemy import select, update, delete, and_, or_, case, exists, func, literal, tuple_, union_all
+from app.models.database import Plan, PlanBody, Exercise, PlanExercise
+import hashlib
+import json
+from collections import Counter
+from typing import List, Optional, Dict, Any, Tuple
+
+def normalize_exercise_name(name: str) -> str:
+    """Catalog key for an exercise name: lowercase with single spaces"""
+    return " ".join(name.lower().split())
+
+def plan_content_query(*columns):
+    """Select the given plan columns plus the plan's stored plan_data and plan_blob.
+
+    Deduplicated plans keep their content in plan_bodies, so it is read from
+    there when body_hash is set and from the plans row otherwise.
+    """
+    return select(
+        *columns,
+        func.coalesce(PlanBody.plan_data, Plan.plan_data).label("plan_data"),
+        func.coalesce(PlanBody.plan_blob, Plan.plan_blob).label("plan_blob")
+    ).select_from(Plan).outerjoin(PlanBody, PlanBody.hash == Plan.body_hash)
+
+# Databases whose INSERT takes an ON CONFLICT clause
+ON_CONFLICT_DIALECTS = ("postgresql", "sqlite")
+
+def upsert_statements(
+    dialect_name: str,
+    model,
+    keys: List[str],
+    rows: List[Dict[str, Any]],
+    replace: Tuple[str, ...] = (),
+    increment: Tuple[str, ...] = ()
+) -> List:
+    """Statements inserting rows into model's table, updating the rows whose keys already exist.
+
+    Existing rows take the incoming value of the replace columns and are
+    increased by the incoming value of the increment columns; with neither
+    they are left alone. Postgres and SQLite get one INSERT ... ON CONFLICT.
+    Other databases get an UPDATE of the existing rows, which locks them,
+    followed by an INSERT of the rows still missing.
+    """
+    table = model.__table__
+    columns = list(rows[0])
+    if dialect_name in ON_CONFLICT_DIALECTS:
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table).values(rows)
+        if not replace and not increment:
+            return [stmt.on_conflict_do_nothing(index_elements=keys)]
+        set_ = {name: stmt.excluded[name] for name in replace}
+        set_.update((name, table.c[name] + stmt.excluded[name]) for name in increment)
+        # ON CONFLICT DO UPDATE skips onupdate defaults that a plain UPDATE applies
+        set_.update(
+            (column.name, column.onupdate.arg) for column in table.c
+            if column.onupdate is not None and column.name not in set_
+        )
+        return [stmt.on_conflict_do_update(index_elements=keys, set_=set_)]
+
+    def matches(row):
+        return and_(*(table.c[key] == row[key] for key in keys))
+
+    def incoming(name):
+        return case(*((matches(row), literal(row[name], table.c[name].type)) for row in rows))
+
+    statements = []
+    if replace or increment:
+        assigned = {name: incoming(name) for name in replace}
+        assigned.update((name, table.c[name] + incoming(name)) for name in increment)
+        statements.append(update(table).where(or_(*(matches(row) for row in rows))).values(assigned))
+    missing = [
+        select(*(literal(row[name], table.c[name].type) for name in columns)).where(~exists().where(matches(row)))
+        for row in rows
+    ]
+    statements.append(table.insert().from_select(
+        columns, missing[0] if len(missing) == 1 else union_all(*missing)
+    ))
+    return statements
+
+def plan_body_hash(plan_data: Dict[str, Any]) -> str:
+    """Content address of plan data: sha256 of its canonical JSON (sorted keys, no whitespace)"""
+    canonical = json.dumps(plan_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def body_refs_statements(
+    dialect_name: str,
+    bodies: Dict[str, Tuple[str, Optional[bytes]]],
+    new_hashes: List[Optional[str]],
+    old_hashes: List[Optional[str]]
+) -> Tuple[List, List]:
+    """Statements moving plan references from old_hashes to new_hashes: (before the plan write, after it).
+
+    Added references go first, as an upsert that also inserts bodies not
+    stored yet (bodies must hold their encoded content). Dropped references
+    are taken away after the plans are written, and bodies left without
+    references are deleted. Hashes are sorted so concurrent writers lock
+    bodies in the same order.
+    """
+    counts = Counter(body_hash for body_hash in new_hashes if body_hash)
+    counts.subtract(body_hash for body_hash in old_hashes if body_hash)
+    added = sorted(body_hash for body_hash, count in counts.items() if count > 0)
+    dropped = sorted(body_hash for body_hash, count in counts.items() if count < 0)
+    before, after = [], []
+    if added:
+        before.extend(upsert_statements(dialect_name, PlanBody, ["hash"], [
+            {
+                "hash": body_hash,
+                "plan_data": bodies[body_hash][0],
+                "plan_blob": bodies[body_hash][1],
+                "ref_count": counts[body_hash],
+            }
+            for body_hash in added
+        ], increment=("ref_count",)))
+    if dropped:
+        after.append(update(PlanBody).where(PlanBody.hash.in_(dropped)).values(
+            ref_count=PlanBody.ref_count + case(*((PlanBody.hash == body_hash, counts[body_hash]) for body_hash in dropped))
+        ))
+        after.append(delete(PlanBody).where(PlanBody.hash.in_(dropped), PlanBody.ref_count <= 0))
+    return before, after
+
+def plan_exercise_names(plan_data: Dict[str, Any]) -> Dict[str, str]:
+    """Catalog key -> name for every exercise in decoded plan data"""
+    names = {}
+    for day in plan_data.get('days', []):
+        for workout in day.get('workouts', []):
+            name = " ".join((workout.get('exercise') or "").split())
+            if name:
+                names.setdefault(normalize_exercise_name(name), name)
+    return names
+
+def insert_exercises_statements(dialect_name: str, names: Dict[str, str]) -> List:
+    """Add catalog entries for names not seen before; existing keys are left alone"""
+    # Sorted so concurrent writers take the unique-index locks in the same order
+    return upsert_statements(dialect_name, Exercise, ["name_key"], [
+        {"name": names[key], "name_key": key} for key in sorted(names)
+    ])
+
+def exercise_ids_query(keys: List[str]):
+    return select(Exercise.id, Exercise.name, Exercise.name_key).where(Exercise.name_key.in_(keys))
+
+def plan_exercise_volumes(plan_data: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    """Catalog key -> (total sets, total reps) for every exercise in decoded plan data"""
+    volumes = {}
+    for day in plan_data.get('days', []):
+        for workout in day.get('workouts', []):
+            name = " ".join((workout.get('exercise') or "").split())
+            if not name:
+                continue
+            key = normalize_exercise_name(name)
+            sets = workout.get('sets') or 0
+            total_sets, total_reps = volumes.get(key, (0, 0))
+            volumes[key] = (total_sets + sets, total_reps + sets * (workout.get('reps') or 0))
+    return volumes
+
+# Rows per multi-row plan_exercises insert, well under SQLite's bound-parameter limit
+EXERCISE_ROWS_PER_INSERT = 1000
+
+def replace_plan_exercises_statements(plans: Dict[Tuple[str, str], Dict[str, Any]], ids: Dict[str, int]):
+    """Statements rewriting the exercise rows of the given (client_id, week_start_iso) plans.
+
+    Each row is both a reverse-index entry and that week's volume for the
+    exercise, so replacing a week's rows takes the old plan's contribution
+    out of the analytics and puts the new one in.
+    """
+    statements = [
+        delete(PlanExercise).where(
+            tuple_(PlanExercise.client_id, PlanExercise.week_start_iso).in_(list(plans))
+        )
+    ]
+    rows = [
+        {
+            "exercise_id": ids[key],
+            "client_id": client_id,
+            "week_start_iso": week_start_iso,
+            "sets": sets,
+            "reps": reps,
+        }
+        for (client_id, week_start_iso), plan_data in plans.items()
+        for key, (sets, reps) in plan_exercise_volumes(plan_data).items()
+    ]
+    for start in range(0, len(rows), EXERCISE_ROWS_PER_INSERT):
+        statements.append(PlanExercise.__table__.insert().values(rows[start:start + EXERCISE_ROWS_PER_INSERT]))
+    return statements
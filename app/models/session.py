@@ -26,3 +26,7 @@ class SessionUpdate(BaseModel):
 
 class SessionResponse(BaseModel):
     session_id: str
+
+class SessionPage(BaseModel):
+    sessions: List[Session]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.models.chat import ChatMessage
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry (one copy per worker)"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """Local key-value file shared by every worker on the host, LRU by last access"""
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_cache_accessed_at ON chat_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM chat_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE chat_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            self._conn.execute("DELETE FROM chat_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM chat_cache WHERE key IN ("
+                "SELECT key FROM chat_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_cache")
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0]
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+class ChatResponseCache:
+    """Exact-match cache of assistant replies keyed on everything that shapes the completion"""
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: str,
+        history: List[ChatMessage],
+        user_input: str,
+        temperature: float
+    ) -> str:
+        payload = json.dumps([
+            model,
+            _normalize(system_prompt),
+            [[msg.role, _normalize(msg.content)] for msg in history],
+            _normalize(user_input),
+            temperature,
+        ], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        self.backend.set(key, value, self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+def create_chat_cache() -> Optional[ChatResponseCache]:
+    """Build the cache selected in Settings, or None when caching is disabled"""
+    if not settings.CHAT_CACHE_ENABLED:
+        return None
+    if settings.CHAT_CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(settings.CHAT_CACHE_PATH, settings.CHAT_CACHE_MAX_ENTRIES)
+    elif settings.CHAT_CACHE_BACKEND == "memory":
+        backend = MemoryCacheBackend(settings.CHAT_CACHE_MAX_ENTRIES)
+    else:
+        raise ValueError(f"Unknown CHAT_CACHE_BACKEND: {settings.CHAT_CACHE_BACKEND}")
+    return ChatResponseCache(backend, settings.CHAT_CACHE_TTL)
@@ -0,0 +1,108 @@
+import hashlib
+import math
+from typing import Awaitable, Callable, List, Optional
+from app.services.chat_cache import MemoryCacheBackend
+
+# Rough per-message framing cost (role markers, separators) in the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+def estimate_tokens(text: str) -> int:
+    """Approximate Llama-family token count (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+def count_message_tokens(messages: List[dict]) -> int:
+    return sum(estimate_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+class HistoryCompactor:
+    """Keep prompts inside a token budget by summarizing the oldest turns.
+
+    Leading system messages are always kept. When the rest of the history
+    does not fit, the oldest turns are replaced by one summary message. The
+    summarized prefix only grows in steps of ``chunk`` messages so the same
+    summary is reused across several turns, and summaries are cached by a
+    hash of the prefix they cover so a longer prefix only summarizes the
+    turns added since the last one.
+    """
+    def __init__(
+        self,
+        summarize: Callable[[List[dict]], Awaitable[str]],
+        budget: int,
+        summary_tokens: int,
+        chunk: int,
+        cache_entries: int = 512,
+        cache_ttl: float = 24 * 3600
+    ):
+        self.summarize = summarize
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.chunk = max(chunk, 1)
+        self.cache_ttl = cache_ttl
+        self._summaries = MemoryCacheBackend(cache_entries)
+
+    @staticmethod
+    def _prefix_hashes(turns: List[dict]) -> List[str]:
+        """Rolling hash of every prefix: hashes[i] covers turns[:i + 1]"""
+        hashes = []
+        digest = b""
+        for msg in turns:
+            digest = hashlib.sha256(digest + msg["role"].encode() + b"\0" + msg["content"].encode()).digest()
+            hashes.append(digest.hex())
+        return hashes
+
+    async def _summary_for(self, turns: List[dict]) -> str:
+        hashes = self._prefix_hashes(turns)
+        cached = self._summaries.get(hashes[-1])
+        if cached is not None:
+            return cached["summary"]
+
+        # Extend the longest prefix we already summarized instead of starting over
+        start, previous = 0, None
+        for i in range(len(hashes) - 2, -1, -1):
+            entry = self._summaries.get(hashes[i])
+            if entry is not None:
+                start, previous = i + 1, entry["summary"]
+                break
+
+        to_summarize = turns[start:]
+        if previous is not None:
+            to_summarize = [{"role": "system", "content": SUMMARY_PREFIX + previous}] + to_summarize
+        summary = await self.summarize(to_summarize)
+        self._summaries.set(hashes[-1], {"summary": summary}, self.cache_ttl)
+        return summary
+
+    async def compact(self, messages: List[dict], reserve: int = 0) -> List[dict]:
+        """Return ``messages`` fitted into the budget, leaving ``reserve`` tokens free"""
+        budget = self.budget - reserve
+        if count_message_tokens(messages) <= budget:
+            return messages
+
+        pinned_count = 0
+        while pinned_count < len(messages) and messages[pinned_count]["role"] == "system":
+            pinned_count += 1
+        pinned, turns = messages[:pinned_count], messages[pinned_count:]
+
+        # Smallest number of oldest turns to drop so the rest fits next to a summary
+        available = budget - count_message_tokens(pinned) - self.summary_tokens - MESSAGE_OVERHEAD_TOKENS
+        recent_tokens = count_message_tokens(turns)
+        drop = 0
+        while drop < len(turns) and recent_tokens > available:
+            recent_tokens -= estimate_tokens(turns[drop]["content"]) + MESSAGE_OVERHEAD_TOKENS
+            drop += 1
+        # Round up to a whole chunk so the summarized prefix stays stable for a few turns
+        drop = min(math.ceil(drop / self.chunk) * self.chunk, len(turns))
+        if drop == 0:
+            return messages
+
+        try:
+            summary: Optional[str] = await self._summary_for(turns[:drop])
+        except Exception as e:
+            print(f"History summary failed, dropping oldest turns instead: {e}")
+            summary = None
+
+        compacted = list(pinned)
+        if summary:
+            compacted.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+        compacted.extend(turns[drop:])
+        return compacted
@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Optional
+from app.models.plan import WeekPlan
+from app.services.chat_cache import MemoryCacheBackend
+from app.services.repositories.plans_repo_railway import week_start_iso_for_offset
+
+def render_client_profile(client) -> List[str]:
+    """Profile lines for a client: one line of stats, then goals and notes"""
+    profile = [
+        f"Name: {client.name}",
+        f"Age: {client.age}" if client.age else None,
+        f"Sex: {client.sex}" if client.sex else None,
+        f"Height: {client.height_cm} cm" if client.height_cm else None,
+        f"Weight: {client.weight_kg} kg" if client.weight_kg else None,
+        f"Activity: {client.activity_level}" if client.activity_level else None,
+        f"BMR: {client.bmr} kcal" if client.bmr else None,
+        f"TDEE: {client.tdee} kcal" if client.tdee else None,
+        f"Maintenance: {client.calorie_maintenance} kcal" if client.calorie_maintenance else None,
+    ]
+    lines = ["; ".join(item for item in profile if item)]
+    if client.goals:
+        lines.append(f"Goals: {client.goals}")
+    if client.notes:
+        lines.append(f"Notes: {client.notes}")
+    return lines
+
+def render_client_context(client, week_plan: WeekPlan) -> str:
+    """Compact system-prompt block with the client's profile and current week plan"""
+    lines = ["You are coaching this client:"] + render_client_profile(client)
+    if week_plan.days:
+        lines.append(f"Current week plan (week of {week_plan.week_start_iso}):")
+        for day in week_plan.days:
+            workouts = ", ".join(
+                f"{w.exercise} {w.sets}x{w.reps} rest {w.rest_sec}s" for w in day.workouts
+            ) or "rest"
+            lines.append(f"- {day.day}: {workouts}")
+    else:
+        lines.append(f"No plan saved for the week of {week_plan.week_start_iso}.")
+    return "\n".join(lines)
+
+class ClientContextCache:
+    """Rendered client context blocks keyed on what they were built from.
+
+    Each turn runs one small query for the client's updated_at and the
+    current week plan's id/created_at/updated_at. Only when those change
+    (or the week rolls over) are the client row and plan JSON loaded and
+    the block rendered again.
+    """
+    def __init__(self, max_entries: int, ttl: float = 24 * 3600):
+        self.ttl = ttl
+        self._entries = MemoryCacheBackend(max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, client_id: str, username: str, clients_repo, plans_repo) -> Optional[str]:
+        """Context block for a client, or None if the client does not exist"""
+        try:
+            return await self._get(client_id, username, clients_repo, plans_repo)
+        finally:
+            # Don't hold a pooled connection through the LLM round-trip
+            await plans_repo.release()
+
+    async def _get(self, client_id: str, username: str, clients_repo, plans_repo) -> Optional[str]:
+        week_start_iso = week_start_iso_for_offset(0)
+        version = await plans_repo.get_context_version(client_id, username, week_start_iso)
+        if version is None:
+            return None
+
+        key = "|".join([client_id, week_start_iso] + [str(marker) for marker in version])
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached["context"]
+
+        self.misses += 1
+        client = await clients_repo.get_client(client_id, username)
+        if client is None:
+            return None
+        week_plan = await plans_repo.get_week_plan(client_id, 0)
+        context = render_client_context(client, week_plan)
+        self._entries.set(key, {"context": context}, self.ttl)
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self._entries.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
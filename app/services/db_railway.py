@@ -1,6 +1,11 @@
 from sqlalchemy.orm import Session
-from app.models.database import SessionLocal, create_tables
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from app.models.database import SessionLocal, AsyncSessionLocal, engine, async_engine, create_tables
+from app.core.db_pool import pool_status
+from app.models.migrations import run_migrations
 from app.core.config import settings
+import asyncio
 import json
 from typing import List, Optional, Dict, Any
 
@@ -15,6 +20,7 @@ class RailwayDatabaseService:
         """Create database tables if they don't exist"""
         try:
             create_tables()
+            run_migrations()
             print("Database tables initialized successfully")
         except Exception as e:
             print(f"Error initializing database: {e}")
@@ -22,6 +28,30 @@ class RailwayDatabaseService:
     def close(self):
         """Close database connection"""
         pass  # Sessions are managed by get_db()
+    
+    async def close_async(self):
+        """Dispose the async engine's connection pool"""
+        if async_engine is not None:
+            await async_engine.dispose()
+    
+    def pool_stats(self, reset_max: bool = False) -> Dict[str, Any]:
+        """Connection pool occupancy and checkout wait times for each engine"""
+        stats = {"sync": pool_status(engine.pool, reset_max=reset_max)}
+        if async_engine is not None:
+            stats["async"] = pool_status(async_engine.pool, reset_max=reset_max)
+        return stats
+    
+    async def log_pool_stats(self, interval: int):
+        """Print a pool pressure line every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            for name, stats in self.pool_stats(reset_max=True).items():
+                if stats:
+                    print(
+                        f"DB pool [{name}]: checked_out={stats['checked_out']} idle={stats['idle']} "
+                        f"overflow={stats['overflow']}/{stats['max_overflow']} "
+                        f"avg_wait_ms={stats.get('avg_wait_ms')} max_wait_ms={stats.get('max_wait_ms')}"
+                    )
 
 # Global instance
 db_service = RailwayDatabaseService()
@@ -33,3 +63,51 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Helper function to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class ThreadedRepository:
+    """Expose a sync repository's methods as coroutines run in the threadpool"""
+    def __init__(self, repo):
+        self._repo = repo
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._repo, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(attr, *args, **kwargs)
+        return call
+
+async def call_repository(sync_repo_cls, async_repo_cls, method: str, *args, **kwargs):
+    """Run one repository method in a session of its own, for work outside a request"""
+    if settings.DATABASE_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await getattr(async_repo_cls(db), method)(*args, **kwargs)
+    
+    def call():
+        db = SessionLocal()
+        try:
+            return getattr(sync_repo_cls(db), method)(*args, **kwargs)
+        finally:
+            db.close()
+    return await run_in_threadpool(call)
+
+def repository_dependency(sync_repo_cls, async_repo_cls):
+    """Build a dependency returning the repository for the configured engine mode.
+
+    Handlers always await repository calls: with DATABASE_ASYNC the async
+    repository runs on the async engine, otherwise the sync repository is
+    moved off the event loop onto the threadpool.
+    """
+    if settings.DATABASE_ASYNC:
+        async def dependency(db=Depends(get_async_db)):
+            return async_repo_cls(db)
+    else:
+        def dependency(db: Session = Depends(get_db)):
+            return ThreadedRepository(sync_repo_cls(db))
+    return dependency
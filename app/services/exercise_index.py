@@ -0,0 +1,90 @@
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+from app.models.plan_statements import normalize_exercise_name
+
+# Trie key holding the exercise ids whose indexed text ends at that node
+_IDS = ""
+
+class ExerciseIndex:
+    """In-memory prefix index over the exercise catalog for autocomplete.
+
+    Every word of a name starts an entry in a character trie, so "dead"
+    finds both "Deadlift" and "Romanian Deadlift". Loaded from the exercises
+    table at startup and extended as plan saves add new exercises; another
+    process's additions show up here after its next restart.
+    """
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+        self._names: Dict[int, str] = {}
+        self._keys: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}
+        # Sync repositories add exercises from threadpool threads
+        self._lock = threading.Lock()
+
+    def load(self, exercises: Iterable[Tuple[int, str]]):
+        with self._lock:
+            self._root = {}
+            self._names = {}
+            self._keys = {}
+            self._ids = {}
+            for exercise_id, name in exercises:
+                self._insert(exercise_id, name)
+
+    def add_many(self, exercises: Iterable[Tuple[int, str]]):
+        with self._lock:
+            for exercise_id, name in exercises:
+                if exercise_id not in self._names:
+                    self._insert(exercise_id, name)
+
+    def _insert(self, exercise_id: int, name: str):
+        key = normalize_exercise_name(name)
+        self._names[exercise_id] = name
+        self._keys[exercise_id] = key
+        self._ids[key] = exercise_id
+        words = key.split(" ")
+        for start in range(len(words)):
+            node = self._root
+            for char in " ".join(words[start:]):
+                node = node.setdefault(char, {})
+            node.setdefault(_IDS, set()).add(exercise_id)
+
+    def ids_for(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Catalog ids already known for these normalized names"""
+        with self._lock:
+            return {key: self._ids[key] for key in keys if key in self._ids}
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """Exercises with a word starting with query; whole-name prefix matches first, then shorter names"""
+        prefix = normalize_exercise_name(query)
+        if not prefix:
+            return []
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.get(char)
+                if node is None:
+                    return []
+            found = set()
+            stack = [node]
+            while stack:
+                node = stack.pop()
+                for char, child in node.items():
+                    if char == _IDS:
+                        found.update(child)
+                    else:
+                        stack.append(child)
+            ranked = sorted(
+                found,
+                key=lambda exercise_id: (
+                    not self._keys[exercise_id].startswith(prefix),
+                    len(self._keys[exercise_id]),
+                    self._keys[exercise_id]
+                )
+            )
+            return [(exercise_id, self._names[exercise_id]) for exercise_id in ranked[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"exercises": len(self._names)}
+
+# Global instance
+exercise_index = ExerciseIndex()
@@ -1,12 +1,40 @@
-from groq import Groq
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient
 from app.core.config import settings
 from app.models.chat import ChatMessage, ChatRequest, ChatResponse
-from typing import List
+from app.models.plan import WeekPlan
+from app.services.chat_cache import ChatResponseCache, create_chat_cache
+from app.services.single_flight import SingleFlight
+from app.services.chat_history import HistoryCompactor, estimate_tokens
+from app.services.groq_resilience import GroqServiceError, create_groq_admission
+from app.services.model_router import FAST, LARGE, create_model_router
+from app.services.usage_recorder import create_usage_recorder
+from app.services.client_context import ClientContextCache, render_client_profile
+import asyncio
+import json
+import time
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
 class GroqService:
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client: Optional[AsyncGroq] = None
         self.model = settings.GROQ_MODEL
+        self.max_tokens = 1000
+        self.temperature = 0.7
+        self.cache = create_chat_cache()
+        self.single_flight = SingleFlight() if settings.CHAT_SINGLE_FLIGHT_ENABLED else None
+        self.admission = create_groq_admission()
+        self.router = create_model_router()
+        self.usage = create_usage_recorder()
+        self.client_context = ClientContextCache(settings.CHAT_CLIENT_CONTEXT_CACHE_ENTRIES)
+        self.history_compactor = None
+        if settings.CHAT_HISTORY_COMPACTION_ENABLED:
+            self.history_compactor = HistoryCompactor(
+                self._summarize,
+                budget=settings.CHAT_HISTORY_TOKEN_BUDGET,
+                summary_tokens=settings.CHAT_HISTORY_SUMMARY_TOKENS,
+                chunk=settings.CHAT_HISTORY_COMPACT_CHUNK
+            )
         
         self.system_prompt = """You are a helpful gym and dietary coaching assistant. Provide safe, concise, goal-oriented guidance for fitness and nutrition.
 
@@ -26,53 +54,305 @@ You help with:
 - Goal setting and motivation
 
 Always prioritize safety and proper form over intensity."""
+        
+        self.summary_prompt = """Summarize the coaching conversation below for your own future reference. Keep the client's goals, stats, injuries, preferences, agreed plans and any numbers; drop small talk. Write at most a short paragraph."""
+        
+        self.plan_prompt = """Write one week of training for the client as a JSON object and nothing else, in exactly this shape:
+{"days": [{"day": "Mon", "workouts": [{"exercise": "Back Squat", "sets": 4, "reps": 8, "rest_sec": 120, "notes": "RPE 7"}]}]}
+Use the day names Mon, Tue, Wed, Thu, Fri, Sat, Sun. Leave rest days out or give them an empty workouts list. sets, reps and rest_sec are integers; notes is a short string, possibly empty. Fit the volume to the client's goals, activity level and notes."""
 
-    def send_message(self, request: ChatRequest) -> ChatResponse:
-        try:
-            # Prepare messages for Groq API
-            messages = []
-            
-            # Add system prompt if not already present
-            has_system = any(msg.role == "system" for msg in request.conversation_history)
-            if not has_system:
-                messages.append({"role": "system", "content": self.system_prompt})
-            
-            # Add conversation history
-            for msg in request.conversation_history:
-                messages.append({"role": msg.role, "content": msg.content})
-            
-            # Add user input
-            messages.append({"role": "user", "content": request.user_input})
-            
-            # Call Groq API
-            response = self.client.chat.completions.create(
-                model=self.model,
+    async def start(self):
+        """Open the shared keep-alive HTTP connection pool used for every Groq call"""
+        if self.usage is not None:
+            self.usage.start()
+        if self.client is not None:
+            return
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.GROQ_TIMEOUT, connect=settings.GROQ_CONNECT_TIMEOUT)
+        )
+        # Retries are handled by self.admission so they respect the breaker and concurrency limit
+        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=http_client, max_retries=0)
+    
+    async def close(self):
+        """Close the connection pool and write any buffered usage"""
+        if self.usage is not None:
+            await self.usage.close()
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+    
+    async def _get_client(self) -> AsyncGroq:
+        if self.client is None:
+            await self.start()
+        return self.client
+    
+    async def _build_messages(self, request: ChatRequest, context: Optional[str] = None) -> List[dict]:
+        """Prepare messages for Groq API"""
+        messages = []
+        
+        # Add system prompt if not already present
+        has_system = any(msg.role == "system" for msg in request.conversation_history)
+        if not has_system:
+            messages.append({"role": "system", "content": self.system_prompt})
+        
+        # Client profile and plan go right after the fixed prompt so the shared prefix stays stable
+        if context:
+            messages.append({"role": "system", "content": context})
+        
+        # Add conversation history
+        for msg in request.conversation_history:
+            messages.append({"role": msg.role, "content": msg.content})
+        
+        # Keep long conversations inside the model's context window
+        if self.history_compactor is not None:
+            messages = await self.history_compactor.compact(
+                messages, reserve=estimate_tokens(request.user_input)
+            )
+        
+        # Add user input
+        messages.append({"role": "user", "content": request.user_input})
+        return messages
+    
+    async def _summarize(self, messages: List[dict]) -> str:
+        """Condense older turns into a short summary for history compaction"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        # Never send the summarizer more than one budget's worth of text
+        transcript = transcript[-settings.CHAT_HISTORY_TOKEN_BUDGET * 4:]
+        
+        client = await self._get_client()
+        
+        async def attempt(route, is_last):
+            return await self.admission.call(lambda: client.chat.completions.create(
+                model=route.model,
+                messages=[
+                    {"role": "system", "content": self.summary_prompt},
+                    {"role": "user", "content": transcript}
+                ],
+                max_tokens=settings.CHAT_HISTORY_SUMMARY_TOKENS,
+                temperature=0.2,
+                timeout=route.timeout
+            ), route.breaker, max_retries=None if is_last else 0)
+        
+        start = time.monotonic()
+        response, model = await self.router.run(FAST, attempt)
+        self._record_usage("summary", model, self._usage_dict(getattr(response, 'usage', None), model), start)
+        return response.choices[0].message.content.strip()
+    
+    @staticmethod
+    def _usage_dict(usage, model: str) -> Optional[dict]:
+        """Prepare usage info"""
+        if usage is None:
+            return None
+        return {
+            "tokens_in": usage.prompt_tokens,
+            "tokens_out": usage.completion_tokens,
+            "model": model
+        }
+    
+    def _record_usage(
+        self,
+        flow: str,
+        model: Optional[str],
+        usage: Optional[dict],
+        start: Optional[float] = None,
+        cache_hit: bool = False,
+        client_id: Optional[str] = None
+    ):
+        """Queue one usage row; written to the database in the background"""
+        if self.usage is None:
+            return
+        usage = usage or {}
+        self.usage.record(
+            flow=flow,
+            model=model,
+            tokens_in=usage.get("tokens_in") or 0,
+            tokens_out=usage.get("tokens_out") or 0,
+            latency_ms=int((time.monotonic() - start) * 1000) if start is not None else 0,
+            cache_hit=cache_hit,
+            client_id=client_id
+        )
+    
+    def _build_response(self, request: ChatRequest, assistant_response: str, usage: Optional[dict]) -> ChatResponse:
+        """Append the new turn to the conversation history"""
+        updated_history = request.conversation_history.copy()
+        updated_history.append(ChatMessage(role="user", content=request.user_input))
+        updated_history.append(ChatMessage(role="assistant", content=assistant_response))
+        
+        return ChatResponse(
+            response=assistant_response,
+            conversation_history=updated_history,
+            usage=usage
+        )
+    
+    def cache_key(self, request: ChatRequest, context: Optional[str] = None) -> str:
+        system_prompt = f"{self.system_prompt}\n\n{context}" if context else self.system_prompt
+        return ChatResponseCache.make_key(
+            self.router.route_key(self.router.tier_for(request.user_input)), system_prompt,
+            request.conversation_history, request.user_input, self.temperature
+        )
+    
+    async def _complete(
+        self,
+        request: ChatRequest,
+        flow: str = "chat",
+        context: Optional[str] = None
+    ) -> Tuple[str, Optional[dict]]:
+        """Run one completion and return the reply text and usage"""
+        messages = await self._build_messages(request, context)
+        client = await self._get_client()
+        
+        # Call Groq API, falling back across models; only the last candidate retries in place
+        async def attempt(route, is_last):
+            return await self.admission.call(lambda: client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                timeout=route.timeout
+            ), route.breaker, max_retries=None if is_last else 0)
+        
+        start = time.monotonic()
+        response, model = await self.router.run(self.router.tier_for(request.user_input), attempt)
+        usage = self._usage_dict(getattr(response, 'usage', None), model)
+        self._record_usage(flow, model, usage, start, client_id=request.client_id)
+        return response.choices[0].message.content, usage
+    
+    async def generate_week_plan(self, client_row, week_start_iso: str) -> WeekPlan:
+        """Draft a week plan for a client as structured JSON, re-asking once if it does not parse"""
+        client = await self._get_client()
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "system", "content": self.plan_prompt},
+            {"role": "user", "content": "\n".join(
+                [f"Plan the week starting {week_start_iso} for this client:"] + render_client_profile(client_row)
+            )}
+        ]
+        
+        async def attempt(route, is_last):
+            return await self.admission.call(lambda: client.chat.completions.create(
+                model=route.model,
                 messages=messages,
-                max_tokens=1000,
-                temperature=0.7
+                max_tokens=2000,
+                temperature=0.4,
+                response_format={"type": "json_object"},
+                timeout=route.timeout
+            ), route.breaker, max_retries=None if is_last else 0)
+        
+        error = None
+        for _ in range(2):
+            start = time.monotonic()
+            response, model = await self.router.run(LARGE, attempt)
+            self._record_usage(
+                "plan", model, self._usage_dict(getattr(response, 'usage', None), model), start,
+                client_id=client_row.client_id
             )
+            content = response.choices[0].message.content
+            try:
+                data = json.loads(content)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+                return WeekPlan(client_id=client_row.client_id, week_start_iso=week_start_iso, days=data.get("days", []))
+            except ValueError as e:
+                error = e
+                messages = messages + [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": f"That plan was invalid ({str(e)[:500]}). Reply with the corrected JSON object only."}
+                ]
+        raise ValueError(f"Model returned an invalid plan: {error}")
+    
+    async def send_message(
+        self,
+        request: ChatRequest,
+        flow: str = "chat",
+        context: Optional[str] = None
+    ) -> ChatResponse:
+        """Complete one turn; ``context`` is an extra system block such as a client profile"""
+        cache_key = None
+        if self.cache is not None or self.single_flight is not None:
+            cache_key = self.cache_key(request, context)
+        
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record_usage(
+                    flow, cached["usage"].get("model"), cached["usage"], cache_hit=True, client_id=request.client_id
+                )
+                return self._build_response(
+                    request, cached["response"], {**cached["usage"], "cache_hit": True}
+                )
+        
+        try:
+            if self.single_flight is not None:
+                # Identical concurrent requests share one upstream call
+                assistant_response, usage = await self.single_flight.do(
+                    cache_key,
+                    lambda: self._complete(request, flow, context),
+                    timeout=settings.CHAT_SINGLE_FLIGHT_TIMEOUT
+                )
+            else:
+                assistant_response, usage = await self._complete(request, flow, context)
+        except asyncio.TimeoutError:
+            raise GroqServiceError("Timed out waiting for chat completion", status_code=504)
+        except GroqServiceError:
+            raise
+        except Exception as e:
+            raise Exception(f"Groq API error: {str(e)}")
+        
+        if self.cache is not None:
+            self.cache.set(cache_key, {"response": assistant_response, "usage": usage or {}})
+        return self._build_response(request, assistant_response, usage)
+    
+    async def stream_message(
+        self,
+        request: ChatRequest,
+        context: Optional[str] = None
+    ) -> AsyncIterator[Union[str, ChatResponse]]:
+        """Yield completion text deltas as they arrive, then the final ChatResponse"""
+        try:
+            messages = await self._build_messages(request, context)
+            client = await self._get_client()
+            # Hold a concurrency slot for the whole stream; only opening it is retried
+            start = time.monotonic()
+            async with self.admission.slot():
+                async def attempt(route, is_last):
+                    return await self.admission.retrying(lambda: client.chat.completions.create(
+                        model=route.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                        stream=True,
+                        timeout=route.timeout
+                    ), route.breaker, max_retries=None if is_last else 0)
+                
+                stream, model = await self.router.run(self.router.tier_for(request.user_input), attempt)
+                
+                parts = []
+                usage = None
+                try:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            yield chunk.choices[0].delta.content
+                        # Groq reports usage on the last chunk under x_groq
+                        chunk_usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+                        if chunk_usage is not None:
+                            usage = chunk_usage
+                finally:
+                    # Also runs when the SSE client disconnects mid-stream, so the
+                    # pooled connection is released instead of reading on until GC
+                    await stream.close()
             
-            assistant_response = response.choices[0].message.content
-            
-            # Update conversation history
-            updated_history = request.conversation_history.copy()
-            updated_history.append(ChatMessage(role="user", content=request.user_input))
-            updated_history.append(ChatMessage(role="assistant", content=assistant_response))
-            
-            # Prepare usage info
-            usage = None
-            if hasattr(response, 'usage'):
-                usage = {
-                    "tokens_in": response.usage.prompt_tokens,
-                    "tokens_out": response.usage.completion_tokens
-                }
-            
-            return ChatResponse(
-                response=assistant_response,
-                conversation_history=updated_history,
-                usage=usage
-            )
+            usage = self._usage_dict(usage, model)
+            self._record_usage("stream", model, usage, start, client_id=request.client_id)
+            yield self._build_response(request, "".join(parts), usage)
             
+        except GroqServiceError:
+            raise
         except Exception as e:
             raise Exception(f"Groq API error: {str(e)}")
 
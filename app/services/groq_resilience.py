@@ -0,0 +1,218 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+from groq import APIConnectionError, APIStatusError, APITimeoutError
+from app.core.config import settings
+
+class GroqServiceError(Exception):
+    """Upstream failure the chat routes report with a specific status instead of a 500"""
+    def __init__(self, message: str, status_code: int = 503, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class CircuitOpenError(GroqServiceError):
+    """A model's circuit breaker refused the call; other models may still be tried"""
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the upstream asked us to wait, from retry-after-ms / retry-after headers"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, then probe with a single call"""
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self):
+        """Raise GroqServiceError unless a call may go upstream now"""
+        if self.state == self.OPEN:
+            if self.retry_in() > 0:
+                raise CircuitOpenError(
+                    "Chat service temporarily unavailable", retry_after=self.retry_in()
+                )
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(
+                    "Chat service temporarily unavailable", retry_after=self.reset_timeout
+                )
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Give up a half-open probe that ended without an upstream verdict"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_in": round(self.retry_in(), 3) if self.state == self.OPEN else 0.0,
+        }
+
+class GroqAdmission:
+    """Client-side admission control for Groq: bounded concurrency and retries.
+
+    Each call is checked against the circuit breaker of the model it goes
+    to (see ModelRoute), so one failing model does not stop the others.
+    """
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_timeout: float,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.retries = 0
+        self.failures = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the concurrency slots, waiting at most queue_timeout for it"""
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise GroqServiceError("Chat service is busy, please retry", retry_after=self.queue_timeout)
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Honor retry-after when given, else full-jitter exponential backoff"""
+        hinted = _retry_after(error)
+        if hinted is not None:
+            return min(hinted, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def retrying(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        breaker: CircuitBreaker,
+        max_retries: Optional[int] = None
+    ) -> Any:
+        """Call fn, retrying rate limits, 5xx and connection errors while the breaker allows"""
+        if max_retries is None:
+            max_retries = self.max_retries
+        attempt = 0
+        while True:
+            breaker.allow()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                if not _is_retryable(e):
+                    # Client-side errors say nothing about upstream health
+                    breaker.release_probe()
+                    raise
+                # The breaker counts calls that gave up, not attempts, so a few
+                # retried requests cannot open it for everyone; a failed
+                # half-open probe is final and reopens it at once
+                if attempt >= max_retries or breaker.state == CircuitBreaker.HALF_OPEN:
+                    breaker.record_failure()
+                    self.failures += 1
+                    status_code = 429 if getattr(e, "status_code", None) == 429 else 503
+                    raise GroqServiceError(
+                        f"Chat service unavailable: {str(e)}",
+                        status_code=status_code,
+                        retry_after=_retry_after(e)
+                    ) from e
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        breaker: CircuitBreaker,
+        max_retries: Optional[int] = None
+    ) -> Any:
+        async with self.slot():
+            return await self.retrying(fn, breaker, max_retries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+def create_groq_admission() -> GroqAdmission:
+    return GroqAdmission(
+        max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+        queue_timeout=settings.GROQ_QUEUE_TIMEOUT,
+        max_retries=settings.GROQ_MAX_RETRIES,
+        base_delay=settings.GROQ_RETRY_BASE_DELAY,
+        max_delay=settings.GROQ_RETRY_MAX_DELAY
+    )
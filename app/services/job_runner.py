@@ -0,0 +1,276 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.job import JobStatus
+from app.services.db_railway import call_repository
+from app.services.repositories.jobs_repo_railway import JobsRepositoryRailway
+from app.services.repositories.jobs_repo_railway_async import JobsRepositoryRailwayAsync
+
+async def _jobs(method: str, *args, **kwargs):
+    return await call_repository(JobsRepositoryRailway, JobsRepositoryRailwayAsync, method, *args, **kwargs)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class JobContext:
+    """What a running async job handler sees: its payload and a progress reporter"""
+    def __init__(self, runner: "JobRunner", job: JobStatus):
+        self.job_id = job.job_id
+        self.payload = job.payload
+        self.attempt = job.attempts
+        self.progress: Dict[str, Any] = dict(job.progress or {})
+        self._runner = runner
+        self._saved_at = 0.0
+
+    async def report(self, **progress):
+        """Merge progress fields; persisted at most every JOB_PROGRESS_INTERVAL seconds"""
+        self.progress.update(progress)
+        if time.monotonic() - self._saved_at >= self._runner.progress_interval:
+            await self.save_progress()
+
+    async def save_progress(self):
+        self._saved_at = time.monotonic()
+        try:
+            await _jobs("update_job", self.job_id, {"progress": json.dumps(self.progress)})
+        except Exception as e:
+            print(f"Error saving progress for job {self.job_id}: {e}")
+
+class _Handler:
+    def __init__(self, fn: Callable, cpu_bound: bool):
+        self.fn = fn
+        self.cpu_bound = cpu_bound
+
+class JobRunner:
+    """Run queued jobs from the jobs table on a small pool of asyncio workers.
+
+    Handlers are registered per job kind. Async handlers get a JobContext
+    and run on the event loop; CPU-bound handlers are plain module-level
+    functions taking the payload and run in a process pool (or the thread
+    pool when JOB_PROCESS_WORKERS is 0) so they do not stall requests.
+
+    Workers claim the highest-priority due job with a conditional UPDATE, so
+    several app processes can share one table. Failed jobs are retried with
+    exponential backoff until max_attempts; running jobs heartbeat, and jobs
+    whose process died are put back in the queue by whichever runner notices.
+    On shutdown, running jobs get JOB_DRAIN_TIMEOUT seconds to finish and
+    are re-queued if they do not.
+    """
+    def __init__(
+        self,
+        workers: int,
+        process_workers: int,
+        poll_interval: float,
+        retry_base_delay: float,
+        heartbeat_interval: float,
+        stale_after: float,
+        drain_timeout: float,
+        progress_interval: float
+    ):
+        self.workers = workers
+        self.process_workers = process_workers
+        self.poll_interval = poll_interval
+        self.retry_base_delay = retry_base_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.drain_timeout = drain_timeout
+        self.progress_interval = progress_interval
+        self._handlers: Dict[str, _Handler] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        self._cancelling: set = set()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def register(self, kind: str, fn: Callable, cpu_bound: bool = False):
+        """Register the handler for a job kind.
+
+        Async handlers are ``async def fn(ctx: JobContext) -> result``; CPU-bound
+        handlers are picklable ``def fn(payload) -> result``. Results must be
+        JSON-serializable. A CPU-bound job that has already started cannot be
+        interrupted; cancelling it only discards its result.
+        """
+        self._handlers[kind] = _Handler(fn, cpu_bound)
+
+    async def submit(
+        self,
+        username: str,
+        kind: str,
+        payload: Any,
+        priority: int = 0,
+        max_attempts: int = 1
+    ) -> str:
+        """Queue a job and wake an idle worker; returns the job id"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = await _jobs("create_job", username, kind, payload, priority, max_attempts)
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str, username: Optional[str] = None) -> Optional[JobStatus]:
+        """Job status, with live progress for jobs running in this process"""
+        job = await _jobs("get_job", job_id, username)
+        ctx = self._contexts.get(job_id)
+        if job is not None and ctx is not None and job.status == "running":
+            job.progress = dict(ctx.progress)
+        return job
+
+    async def list_jobs(
+        self,
+        username: str,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50
+    ) -> List[JobStatus]:
+        return await _jobs("list_jobs", username, status, kind, limit)
+
+    async def cancel(self, job_id: str, username: str) -> Optional[str]:
+        """Cancel a queued job now, or ask the runner of a running job to stop it"""
+        status = await _jobs("request_cancel", job_id, username)
+        if status == "running" and job_id in self._running:
+            self._cancelling.add(job_id)
+            self._running[job_id].cancel()
+        return status
+
+    async def start(self):
+        if self._worker_tasks:
+            return
+        self._stopping = False
+        if self.process_workers > 0:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._maintenance_task = asyncio.create_task(self._maintain())
+
+    async def _worker(self):
+        while not self._stopping:
+            try:
+                job = await _jobs("claim_next_job", list(self._handlers), _now())
+            except Exception as e:
+                print(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _invoke(self, handler: _Handler, ctx: JobContext):
+        if not handler.cpu_bound:
+            return await handler.fn(ctx)
+        if self._process_pool is not None:
+            return await asyncio.get_running_loop().run_in_executor(self._process_pool, handler.fn, ctx.payload)
+        return await run_in_threadpool(handler.fn, ctx.payload)
+
+    async def _execute(self, job: JobStatus):
+        handler = self._handlers[job.kind]
+        ctx = JobContext(self, job)
+        task = asyncio.create_task(self._invoke(handler, ctx))
+        self._running[job.job_id] = task
+        self._contexts[job.job_id] = ctx
+        try:
+            result = await asyncio.shield(task)
+            values = {"status": "succeeded", "result": json.dumps(result), "error": None}
+            self.completed += 1
+        except asyncio.CancelledError:
+            if not task.done():
+                # The worker itself is being torn down; leave the job for another runner
+                task.cancel()
+                raise
+            if job.job_id in self._cancelling:
+                values = {"status": "cancelled"}
+            else:
+                # Interrupted by shutdown: run it again later, without spending an attempt
+                values = {"status": "queued", "attempts": job.attempts - 1, "run_after": _now()}
+        except Exception as e:
+            if job.attempts < job.max_attempts:
+                delay = self.retry_base_delay * 2 ** (job.attempts - 1)
+                values = {"status": "queued", "error": str(e), "run_after": _now() + timedelta(seconds=delay)}
+                self.retried += 1
+            else:
+                values = {"status": "failed", "error": str(e)}
+                self.failed += 1
+            print(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed: {e}")
+        finally:
+            self._running.pop(job.job_id, None)
+            self._contexts.pop(job.job_id, None)
+            self._cancelling.discard(job.job_id)
+
+        if values["status"] != "queued":
+            values["finished_at"] = _now()
+        values["progress"] = json.dumps(ctx.progress) if ctx.progress else None
+        try:
+            await _jobs("update_job", job.job_id, values)
+        except Exception as e:
+            print(f"Error recording outcome of job {job.job_id}: {e}")
+
+    async def _maintain(self):
+        """Heartbeat running jobs, apply cross-process cancel requests and recover stale jobs"""
+        while True:
+            try:
+                if self._running:
+                    for job_id in await _jobs("heartbeat_jobs", list(self._running), _now()):
+                        if job_id in self._running and job_id not in self._cancelling:
+                            self._cancelling.add(job_id)
+                            self._running[job_id].cancel()
+                requeued = await _jobs("requeue_stale_jobs", _now() - timedelta(seconds=self.stale_after))
+                if requeued:
+                    print(f"Re-queued {requeued} stale job(s)")
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"Error in job maintenance: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def close(self):
+        """Stop claiming, give running jobs drain_timeout to finish, then re-queue the rest"""
+        self._stopping = True
+        self._wakeup.set()
+        running = list(self._running.values())
+        if running:
+            await asyncio.wait(running, timeout=self.drain_timeout)
+        for task in self._running.values():
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            await asyncio.gather(self._maintenance_task, return_exceptions=True)
+            self._maintenance_task = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._worker_tasks),
+            "process_workers": self.process_workers,
+            "running": list(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "kinds": sorted(self._handlers),
+        }
+
+# Global instance
+job_runner = JobRunner(
+    workers=settings.JOB_WORKERS,
+    process_workers=settings.JOB_PROCESS_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    retry_base_delay=settings.JOB_RETRY_BASE_DELAY,
+    heartbeat_interval=settings.JOB_HEARTBEAT_INTERVAL,
+    stale_after=settings.JOB_STALE_AFTER,
+    drain_timeout=settings.JOB_DRAIN_TIMEOUT,
+    progress_interval=settings.JOB_PROGRESS_INTERVAL
+)
@@ -0,0 +1,181 @@
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.chat_history import estimate_tokens
+from app.services.groq_resilience import CircuitBreaker, CircuitOpenError, GroqServiceError
+
+FAST, LARGE = "fast", "large"
+
+# Requests that ask for programming work go to the larger models
+_PLANNING_PATTERN = re.compile(
+    r"\b(plan|program|programme|routine|schedule|split|meal prep|periodi[sz]|macros? for|week)\w*",
+    re.IGNORECASE
+)
+
+class ModelRoute:
+    def __init__(self, model: str, timeout: float):
+        self.model = model
+        self.timeout = timeout
+        self.latencies: Deque[float] = deque(maxlen=200)
+        self.successes = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.breaker: Optional[CircuitBreaker] = None  # set by ModelRouter, one per model
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+    def healthy(self, now: float) -> bool:
+        if self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN and self.breaker.retry_in() > 0:
+            return False
+        return now >= self.cooldown_until
+
+def parse_routes(spec: str, default_timeout: float) -> List[ModelRoute]:
+    """Parse "model[:timeout],model[:timeout]" into routes"""
+    routes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, sep, timeout = item.rpartition(":")
+        if sep and model:
+            try:
+                routes.append(ModelRoute(model, float(timeout)))
+                continue
+            except ValueError:
+                pass
+        routes.append(ModelRoute(item, default_timeout))
+    return routes
+
+class ModelRouter:
+    """Pick a model per request from a routing table, preferring the fastest healthy one.
+
+    Short questions use the fast tier and planning requests the large tier;
+    the other tier's models are appended as fallbacks. Within a tier,
+    healthy models are ordered by observed p95 latency (untried models
+    first so they get measured), and a model that rate-limits or times out
+    is cooled down and only used as a last resort. Every model has its own
+    circuit breaker, so an open breaker also sends requests to the next model.
+    """
+    def __init__(
+        self,
+        tiers: Dict[str, List[ModelRoute]],
+        fast_max_input_tokens: int,
+        cooldown: float,
+        breaker_failure_threshold: int,
+        breaker_reset_timeout: float
+    ):
+        self.tiers = tiers
+        self.fast_max_input_tokens = fast_max_input_tokens
+        self.cooldown = cooldown
+        self.routes: Dict[str, ModelRoute] = {}
+        for routes in tiers.values():
+            for route in routes:
+                self.routes.setdefault(route.model, route)
+        for route in self.routes.values():
+            route.breaker = CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout)
+
+    def tier_for(self, user_input: str) -> str:
+        if estimate_tokens(user_input) > self.fast_max_input_tokens or _PLANNING_PATTERN.search(user_input):
+            return LARGE
+        return FAST
+
+    def candidates(self, tier: str) -> List[ModelRoute]:
+        """Every distinct model for a tier, the tier's own models first"""
+        other = LARGE if tier == FAST else FAST
+        seen, ordered = set(), []
+        for route in self.tiers[tier] + self.tiers[other]:
+            if route.model not in seen:
+                seen.add(route.model)
+                ordered.append(self.routes[route.model])
+        return ordered
+
+    def route_key(self, tier: str) -> str:
+        """Stable description of a tier's routing for cache keys"""
+        return f"{tier}:" + "|".join(route.model for route in self.candidates(tier))
+
+    def order(self, tier: str) -> List[ModelRoute]:
+        now = time.monotonic()
+        own = {route.model for route in self.tiers[tier]}
+        candidates = self.candidates(tier)
+
+        def rank(route: ModelRoute):
+            p95 = route.percentile(0.95)
+            return (route.model not in own, p95 is not None, p95 or 0.0)
+
+        healthy = sorted((r for r in candidates if r.healthy(now)), key=rank)
+        cooling = sorted((r for r in candidates if not r.healthy(now)), key=lambda r: r.cooldown_until)
+        return healthy + cooling
+
+    def record_success(self, route: ModelRoute, latency: float):
+        route.successes += 1
+        route.latencies.append(latency)
+        route.cooldown_until = 0.0
+
+    def record_failure(self, route: ModelRoute, retry_after: Optional[float] = None):
+        route.failures += 1
+        route.cooldown_until = time.monotonic() + (retry_after or self.cooldown)
+
+    async def run(
+        self,
+        tier: str,
+        call: Callable[[ModelRoute, bool], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        """Try models in preference order; ``call(route, is_last)`` performs one attempt.
+
+        Falls through to the next model on upstream errors (rate limits,
+        timeouts, 5xx) and when the model's breaker is open; failures that
+        are not about the model, such as a busy queue, are raised immediately.
+        """
+        routes = self.order(tier)
+        for index, route in enumerate(routes):
+            is_last = index == len(routes) - 1
+            start = time.monotonic()
+            try:
+                result = await call(route, is_last)
+            except CircuitOpenError:
+                if is_last:
+                    raise
+                continue
+            except GroqServiceError as e:
+                if e.__cause__ is None:
+                    raise
+                self.record_failure(route, e.retry_after)
+                if is_last:
+                    raise
+                continue
+            self.record_success(route, time.monotonic() - start)
+            return result, route.model
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            route.model: {
+                "timeout": route.timeout,
+                "successes": route.successes,
+                "failures": route.failures,
+                "p50_ms": round(route.percentile(0.5) * 1000, 1) if route.latencies else None,
+                "p95_ms": round(route.percentile(0.95) * 1000, 1) if route.latencies else None,
+                "cooldown_remaining": round(max(route.cooldown_until - now, 0.0), 3),
+                "breaker": route.breaker.stats(),
+            }
+            for route in self.routes.values()
+        }
+
+def create_model_router() -> ModelRouter:
+    default = f"{settings.GROQ_MODEL}:{settings.GROQ_TIMEOUT}"
+    return ModelRouter(
+        tiers={
+            FAST: parse_routes(settings.GROQ_FAST_MODELS or default, settings.GROQ_TIMEOUT),
+            LARGE: parse_routes(settings.GROQ_LARGE_MODELS or default, settings.GROQ_TIMEOUT),
+        },
+        fast_max_input_tokens=settings.GROQ_FAST_MAX_INPUT_TOKENS,
+        cooldown=settings.GROQ_MODEL_COOLDOWN,
+        breaker_failure_threshold=settings.GROQ_BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_timeout=settings.GROQ_BREAKER_RESET_TIMEOUT
+    )
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.models.job import JobStatus
+from app.models.plan import PlanGenerationJob, WeekPlan
+from app.services.db_railway import call_repository
+from app.services.groq_client import groq_service
+from app.services.job_runner import JobContext, job_runner
+from app.services.repositories.clients_repo_railway import ClientsRepositoryRailway
+from app.services.repositories.clients_repo_railway_async import ClientsRepositoryRailwayAsync
+from app.services.repositories.plans_repo_railway import PlansRepositoryRailway, week_start_iso_for_offset
+from app.services.repositories.plans_repo_railway_async import PlansRepositoryRailwayAsync
+
+JOB_KIND = "generate_week_plans"
+
+async def submit_plan_generation(username: str, client_ids: List[str], week_offset: int) -> str:
+    """Queue a bulk generation job for the given clients; returns the job id"""
+    # Keep first-seen order but generate each client once
+    client_ids = list(dict.fromkeys(client_ids))
+    return await job_runner.submit(username, JOB_KIND, {
+        "username": username,
+        "client_ids": client_ids,
+        "week_start_iso": week_start_iso_for_offset(week_offset),
+    })
+
+def plan_generation_status(job: JobStatus) -> PlanGenerationJob:
+    progress = job.progress or {}
+    return PlanGenerationJob(
+        job_id=job.job_id,
+        status=job.status,
+        week_start_iso=job.payload["week_start_iso"],
+        total=len(job.payload["client_ids"]),
+        generated=progress.get("generated", 0),
+        saved=progress.get("saved", 0),
+        failed=progress.get("failed", 0),
+        errors=progress.get("errors", {}),
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+async def generate_week_plans(ctx: JobContext) -> Dict[str, Any]:
+    """Job handler: draft and save week plans for many clients.
+
+    Generation fans out to Groq with at most PLAN_GENERATION_CONCURRENCY
+    requests in flight for the job (on top of the service-wide admission
+    limit), and parsed plans are saved PLAN_GENERATION_SAVE_BATCH at a time
+    in one transaction each.
+    """
+    username = ctx.payload["username"]
+    client_ids = ctx.payload["client_ids"]
+    week_start_iso = ctx.payload["week_start_iso"]
+    progress = {"generated": 0, "saved": 0, "failed": 0, "errors": {}}
+
+    def fail(client_id: str, reason: str):
+        progress["failed"] += 1
+        progress["errors"][client_id] = reason
+
+    clients = await call_repository(
+        ClientsRepositoryRailway, ClientsRepositoryRailwayAsync, "get_clients_by_ids", username, client_ids
+    )
+    by_id = {client.client_id: client for client in clients}
+    semaphore = asyncio.Semaphore(settings.PLAN_GENERATION_CONCURRENCY)
+    pending: List[WeekPlan] = []
+    save_lock = asyncio.Lock()
+
+    async def save():
+        async with save_lock:
+            batch = pending[:]
+            del pending[:]
+            if not batch:
+                return
+            try:
+                progress["saved"] += await call_repository(
+                    PlansRepositoryRailway, PlansRepositoryRailwayAsync, "save_week_plans", batch
+                )
+            except Exception as e:
+                print(f"Error saving generated plans for job {ctx.job_id}: {e}")
+                for plan in batch:
+                    fail(plan.client_id, f"Save failed: {e}")
+            await ctx.report(**progress)
+
+    async def generate(client_id: str):
+        client = by_id.get(client_id)
+        if client is None:
+            fail(client_id, "Client not found")
+            return
+        async with semaphore:
+            try:
+                plan = await groq_service.generate_week_plan(client, week_start_iso)
+            except Exception as e:
+                fail(client_id, str(e))
+                return
+        progress["generated"] += 1
+        pending.append(plan)
+        if len(pending) >= settings.PLAN_GENERATION_SAVE_BATCH:
+            await save()
+        else:
+            await ctx.report(**progress)
+
+    await asyncio.gather(*(generate(client_id) for client_id in client_ids))
+    await save()
+    return {"saved": progress["saved"], "failed": progress["failed"]}
+
+job_runner.register(JOB_KIND, generate_week_plans)
@@ -1,8 +1,76 @@
+from sqlalchemy import select, tuple_, literal, func
 from sqlalchemy.orm import Session
 from app.models.database import Client
-from app.models.client import ClientCreate, ClientUpdate
+from app.models.client import ClientCreate, ClientUpdate, ClientListItem
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+
+CLIENT_SORT_KEYS = ("name", "created_at", "updated_at")
+CLIENT_LIST_FIELDS = tuple(ClientListItem.model_fields)
+
+def client_sort_column(sort: str):
+    """The expression clients are ordered by for a sort key.
+
+    updated_at falls back to created_at, so rows that never got an
+    updated_at still sort (and page) instead of dropping out as NULL.
+    """
+    if sort == "updated_at":
+        return func.coalesce(Client.updated_at, Client.created_at, type_=Client.updated_at.type)
+    return getattr(Client, sort)
+
+def parse_clients_cursor(after: List[Any], sort: str) -> List[Any]:
+    """Check a decoded (sort value, client_id) cursor and convert its sort value; ValueError if malformed"""
+    sort_value, client_id = after
+    if not isinstance(sort_value, str) or not isinstance(client_id, str):
+        raise ValueError("Invalid cursor")
+    if sort != "name":
+        sort_value = datetime.fromisoformat(sort_value)
+    return [sort_value, client_id]
+
+def clients_page_query(
+    username: str,
+    sort: str,
+    descending: bool,
+    limit: Optional[int],
+    fields: List[str],
+    after: Optional[List[Any]] = None
+):
+    """Select one keyset page of client columns ordered by (sort, client_id).
+
+    Only ``fields`` plus the key columns are loaded. ``after`` is the
+    (sort value, client_id) key of the last row already returned, as
+    returned by parse_clients_cursor; one extra
+    row is fetched so callers can tell whether more remain. A ``limit`` of
+    None returns every remaining client.
+    """
+    sort_col = client_sort_column(sort)
+    columns = list(dict.fromkeys(["client_id", *fields]))
+    query = select(
+        *[getattr(Client, name) for name in columns], sort_col.label("sort_key")
+    ).where(Client.username == username)
+    if after:
+        sort_value, client_id = after
+        key = tuple_(sort_col, Client.client_id)
+        bound = tuple_(literal(sort_value, sort_col.type), literal(client_id, Client.client_id.type))
+        query = query.where(key < bound if descending else key > bound)
+    if descending:
+        query = query.order_by(sort_col.desc(), Client.client_id.desc())
+    else:
+        query = query.order_by(sort_col, Client.client_id)
+    return query if limit is None else query.limit(limit + 1)
+
+def build_clients_page(rows, sort: str, limit: Optional[int], fields: List[str]) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+    """Project rows onto the requested fields and compute the key to continue from"""
+    wanted = ["client_id", *fields]
+    clients = [{name: row._mapping[name] for name in wanted} for row in rows[:limit]]
+    
+    next_key = None
+    if limit is not None and len(rows) > limit:
+        last = rows[limit - 1]._mapping
+        sort_value = last["sort_key"]
+        next_key = [sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value, last["client_id"]]
+    return clients, next_key
 
 class ClientsRepositoryRailway:
     def __init__(self, db: Session):
@@ -48,6 +116,19 @@ class ClientsRepositoryRailway:
         """Get all clients for a user"""
         return self.db.query(Client).filter(Client.username == username).all()
     
+    def get_clients_page(
+        self,
+        username: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int],
+        fields: List[str],
+        after: Optional[List[Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+        """Get one keyset page of clients with only the requested columns"""
+        rows = self.db.execute(clients_page_query(username, sort, descending, limit, fields, after)).all()
+        return build_clients_page(rows, sort, limit, fields)
+    
     def get_client(self, client_id: str, username: str) -> Optional[Client]:
         """Get a specific client"""
         return self.db.query(Client).filter(
@@ -55,6 +136,13 @@ class ClientsRepositoryRailway:
             Client.username == username
         ).first()
     
+    def get_clients_by_ids(self, username: str, client_ids: List[str]) -> List[Client]:
+        """Get several clients in one query; unknown ids are skipped"""
+        return self.db.query(Client).filter(
+            Client.username == username,
+            Client.client_id.in_(client_ids)
+        ).all()
+    
     def update_client(self, client_id: str, username: str, updates: ClientUpdate) -> bool:
         """Update a client"""
         client = self.get_client(client_id, username)
@@ -0,0 +1,95 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import Client
+from app.models.client import ClientCreate, ClientUpdate
+from app.services.repositories.clients_repo_railway import clients_page_query, build_clients_page
+import uuid
+from typing import List, Optional, Dict, Any, Tuple
+
+class ClientsRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_client(self, username: str, client_data: ClientCreate) -> str:
+        """Create a new client"""
+        try:
+            client_id = str(uuid.uuid4())
+            
+            client = Client(
+                client_id=client_id,
+                username=username,
+                **client_data.dict()
+            )
+            
+            self.db.add(client)
+            await self.db.commit()
+            await self.db.refresh(client)
+            
+            return client_id
+        except Exception as e:
+            print(f"Repository: Error creating client: {e}")
+            await self.db.rollback()
+            raise e
+    
+    async def get_clients(self, username: str) -> List[Client]:
+        """Get all clients for a user"""
+        result = await self.db.execute(select(Client).where(Client.username == username))
+        return list(result.scalars().all())
+    
+    async def get_clients_page(
+        self,
+        username: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int],
+        fields: List[str],
+        after: Optional[List[Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+        """Get one keyset page of clients with only the requested columns"""
+        result = await self.db.execute(clients_page_query(username, sort, descending, limit, fields, after))
+        return build_clients_page(result.all(), sort, limit, fields)
+    
+    async def get_client(self, client_id: str, username: str) -> Optional[Client]:
+        """Get a specific client"""
+        result = await self.db.execute(
+            select(Client).where(
+                Client.client_id == client_id,
+                Client.username == username
+            )
+        )
+        return result.scalars().first()
+    
+    async def get_clients_by_ids(self, username: str, client_ids: List[str]) -> List[Client]:
+        """Get several clients in one query; unknown ids are skipped"""
+        result = await self.db.execute(
+            select(Client).where(
+                Client.username == username,
+                Client.client_id.in_(client_ids)
+            )
+        )
+        return list(result.scalars().all())
+    
+    async def update_client(self, client_id: str, username: str, updates: ClientUpdate) -> bool:
+        """Update a client"""
+        client = await self.get_client(client_id, username)
+        if not client:
+            return False
+        
+        # Update only provided fields
+        update_data = updates.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(client, field, value)
+        
+        await self.db.commit()
+        await self.db.refresh(client)
+        return True
+    
+    async def delete_client(self, client_id: str, username: str) -> bool:
+        """Delete a client"""
+        client = await self.get_client(client_id, username)
+        if not client:
+            return False
+        
+        await self.db.delete(client)
+        await self.db.commit()
+        return True
@@ -0,0 +1,59 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.database import Conversation, ConversationMessage
+from app.models.chat import ChatMessage
+import uuid
+from typing import List, Optional
+
+class ConversationsRepositoryRailway:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_conversation(self, username: str) -> str:
+        """Create a new, empty conversation"""
+        conversation_id = str(uuid.uuid4())
+        self.db.add(Conversation(conversation_id=conversation_id, username=username))
+        self.db.commit()
+        return conversation_id
+    
+    def get_conversation(self, conversation_id: str, username: str) -> Optional[Conversation]:
+        """Get a specific conversation"""
+        return self.db.query(Conversation).filter(
+            Conversation.conversation_id == conversation_id,
+            Conversation.username == username
+        ).first()
+    
+    def get_messages(self, conversation_id: str, username: str) -> Optional[List[ChatMessage]]:
+        """Get the stored turns of a conversation in order, or None if it does not exist"""
+        if not self.get_conversation(conversation_id, username):
+            return None
+        
+        rows = self.db.query(ConversationMessage.role, ConversationMessage.content).filter(
+            ConversationMessage.conversation_id == conversation_id
+        ).order_by(ConversationMessage.id).all()
+        # Release the pooled connection before the caller's LLM round-trip
+        self.db.rollback()
+        return [ChatMessage(role=role, content=content) for role, content in rows]
+    
+    def append_messages(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        """Append turns to a conversation"""
+        self.db.add_all([
+            ConversationMessage(conversation_id=conversation_id, role=msg.role, content=msg.content)
+            for msg in messages
+        ])
+        conversation = self.db.get(Conversation, conversation_id)
+        conversation.updated_at = func.now()
+        self.db.commit()
+    
+    def delete_conversation(self, conversation_id: str, username: str) -> bool:
+        """Delete a conversation and its turns"""
+        conversation = self.get_conversation(conversation_id, username)
+        if not conversation:
+            return False
+        
+        self.db.query(ConversationMessage).filter(
+            ConversationMessage.conversation_id == conversation_id
+        ).delete(synchronize_session=False)
+        self.db.delete(conversation)
+        self.db.commit()
+        return True
@@ -0,0 +1,66 @@
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from app.models.database import Conversation, ConversationMessage
+from app.models.chat import ChatMessage
+import uuid
+from typing import List, Optional
+
+class ConversationsRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_conversation(self, username: str) -> str:
+        """Create a new, empty conversation"""
+        conversation_id = str(uuid.uuid4())
+        self.db.add(Conversation(conversation_id=conversation_id, username=username))
+        await self.db.commit()
+        return conversation_id
+    
+    async def get_conversation(self, conversation_id: str, username: str) -> Optional[Conversation]:
+        """Get a specific conversation"""
+        result = await self.db.execute(
+            select(Conversation).where(
+                Conversation.conversation_id == conversation_id,
+                Conversation.username == username
+            )
+        )
+        return result.scalars().first()
+    
+    async def get_messages(self, conversation_id: str, username: str) -> Optional[List[ChatMessage]]:
+        """Get the stored turns of a conversation in order, or None if it does not exist"""
+        if not await self.get_conversation(conversation_id, username):
+            return None
+        
+        result = await self.db.execute(
+            select(ConversationMessage.role, ConversationMessage.content).where(
+                ConversationMessage.conversation_id == conversation_id
+            ).order_by(ConversationMessage.id)
+        )
+        rows = result.all()
+        # Release the pooled connection before the caller's LLM round-trip
+        await self.db.rollback()
+        return [ChatMessage(role=role, content=content) for role, content in rows]
+    
+    async def append_messages(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        """Append turns to a conversation"""
+        self.db.add_all([
+            ConversationMessage(conversation_id=conversation_id, role=msg.role, content=msg.content)
+            for msg in messages
+        ])
+        conversation = await self.db.get(Conversation, conversation_id)
+        conversation.updated_at = func.now()
+        await self.db.commit()
+    
+    async def delete_conversation(self, conversation_id: str, username: str) -> bool:
+        """Delete a conversation and its turns"""
+        conversation = await self.get_conversation(conversation_id, username)
+        if not conversation:
+            return False
+        
+        await self.db.execute(
+            delete(ConversationMessage).where(ConversationMessage.conversation_id == conversation_id)
+        )
+        await self.db.delete(conversation)
+        await self.db.commit()
+        return True
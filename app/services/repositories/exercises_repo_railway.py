@@ -0,0 +1,50 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.database import Exercise, PlanExercise, Client
+from app.models.exercise import Exercise as ExerciseModel, ExerciseUse
+from typing import List, Optional, Tuple
+
+def exercise_uses_query(
+    exercise_id: int,
+    username: str,
+    week_from: Optional[str] = None,
+    week_to: Optional[str] = None,
+    limit: int = 100
+):
+    """Client weeks whose plan uses an exercise, newest week first, via the reverse index"""
+    query = select(PlanExercise.client_id, PlanExercise.week_start_iso).join(
+        Client, Client.client_id == PlanExercise.client_id
+    ).where(
+        PlanExercise.exercise_id == exercise_id,
+        Client.username == username
+    )
+    if week_from:
+        query = query.where(PlanExercise.week_start_iso >= week_from)
+    if week_to:
+        query = query.where(PlanExercise.week_start_iso <= week_to)
+    return query.order_by(PlanExercise.week_start_iso.desc(), PlanExercise.client_id).limit(limit)
+
+class ExercisesRepositoryRailway:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def list_exercises(self) -> List[Tuple[int, str]]:
+        """Get the whole catalog as (id, name) pairs"""
+        return [tuple(row) for row in self.db.execute(select(Exercise.id, Exercise.name)).all()]
+    
+    def get_exercise(self, exercise_id: int) -> Optional[ExerciseModel]:
+        """Get a specific exercise"""
+        exercise = self.db.query(Exercise).filter(Exercise.id == exercise_id).first()
+        return ExerciseModel(id=exercise.id, name=exercise.name) if exercise else None
+    
+    def get_exercise_uses(
+        self,
+        exercise_id: int,
+        username: str,
+        week_from: Optional[str] = None,
+        week_to: Optional[str] = None,
+        limit: int = 100
+    ) -> List[ExerciseUse]:
+        """Get the client weeks whose plan uses an exercise"""
+        rows = self.db.execute(exercise_uses_query(exercise_id, username, week_from, week_to, limit)).all()
+        return [ExerciseUse(client_id=row.client_id, week_start_iso=row.week_start_iso) for row in rows]
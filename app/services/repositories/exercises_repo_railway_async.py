@@ -0,0 +1,33 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import Exercise
+from app.models.exercise import Exercise as ExerciseModel, ExerciseUse
+from app.services.repositories.exercises_repo_railway import exercise_uses_query
+from typing import List, Optional, Tuple
+
+class ExercisesRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def list_exercises(self) -> List[Tuple[int, str]]:
+        """Get the whole catalog as (id, name) pairs"""
+        result = await self.db.execute(select(Exercise.id, Exercise.name))
+        return [tuple(row) for row in result.all()]
+    
+    async def get_exercise(self, exercise_id: int) -> Optional[ExerciseModel]:
+        """Get a specific exercise"""
+        result = await self.db.execute(select(Exercise).where(Exercise.id == exercise_id))
+        exercise = result.scalars().first()
+        return ExerciseModel(id=exercise.id, name=exercise.name) if exercise else None
+    
+    async def get_exercise_uses(
+        self,
+        exercise_id: int,
+        username: str,
+        week_from: Optional[str] = None,
+        week_to: Optional[str] = None,
+        limit: int = 100
+    ) -> List[ExerciseUse]:
+        """Get the client weeks whose plan uses an exercise"""
+        result = await self.db.execute(exercise_uses_query(exercise_id, username, week_from, week_to, limit))
+        return [ExerciseUse(client_id=row.client_id, week_start_iso=row.week_start_iso) for row in result.all()]
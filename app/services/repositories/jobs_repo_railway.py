@@ -0,0 +1,166 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.database import Job
+from app.models.job import JobStatus
+import json
+import uuid
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+
+def build_job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        job_id=job.job_id,
+        kind=job.kind,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        payload=json.loads(job.payload),
+        progress=json.loads(job.progress) if job.progress else None,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        cancel_requested=job.cancel_requested,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+def next_job_query(kinds: List[str], now: datetime):
+    """Highest-priority queued job that is due, oldest first within a priority"""
+    return select(Job.job_id).where(
+        Job.status == "queued",
+        Job.run_after <= now,
+        Job.kind.in_(kinds)
+    ).order_by(Job.priority.desc(), Job.run_after, Job.created_at).limit(1)
+
+def claim_job_statement(job_id: str, now: datetime):
+    """Move a job from queued to running; matches no row if another worker got there first"""
+    return update(Job).where(
+        Job.job_id == job_id,
+        Job.status == "queued"
+    ).values(
+        status="running",
+        attempts=Job.attempts + 1,
+        started_at=now,
+        heartbeat_at=now
+    )
+
+def stale_job_statements(cutoff: datetime):
+    """Finish stale running jobs that must not run again: cancelled or out of attempts"""
+    stale = (Job.status == "running", Job.heartbeat_at < cutoff)
+    return [
+        update(Job).where(*stale, Job.cancel_requested.is_(True)).values(status="cancelled", finished_at=cutoff),
+        update(Job).where(*stale, Job.attempts >= Job.max_attempts).values(
+            status="failed", error="Runner stopped while the job was running", finished_at=cutoff
+        ),
+    ]
+
+def requeue_stale_statement(cutoff: datetime):
+    return update(Job).where(
+        Job.status == "running",
+        Job.heartbeat_at < cutoff
+    ).values(status="queued", run_after=cutoff)
+
+def list_jobs_query(username: str, status: Optional[str], kind: Optional[str], limit: int):
+    query = select(Job).where(Job.username == username)
+    if status:
+        query = query.where(Job.status == status)
+    if kind:
+        query = query.where(Job.kind == kind)
+    return query.order_by(Job.created_at.desc()).limit(limit)
+
+class JobsRepositoryRailway:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_job(
+        self,
+        username: str,
+        kind: str,
+        payload: Any,
+        priority: int = 0,
+        max_attempts: int = 1
+    ) -> str:
+        """Queue a new job"""
+        job_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        self.db.add(Job(
+            job_id=job_id,
+            username=username,
+            kind=kind,
+            status="queued",
+            priority=priority,
+            payload=json.dumps(payload),
+            max_attempts=max_attempts,
+            run_after=now,
+            created_at=now
+        ))
+        self.db.commit()
+        return job_id
+    
+    def get_job(self, job_id: str, username: Optional[str] = None) -> Optional[JobStatus]:
+        """Get a specific job"""
+        query = self.db.query(Job).filter(Job.job_id == job_id)
+        if username is not None:
+            query = query.filter(Job.username == username)
+        job = query.first()
+        return build_job_status(job) if job else None
+    
+    def list_jobs(
+        self,
+        username: str,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50
+    ) -> List[JobStatus]:
+        """Get the most recent jobs, newest first"""
+        jobs = self.db.execute(list_jobs_query(username, status, kind, limit)).scalars().all()
+        return [build_job_status(job) for job in jobs]
+    
+    def claim_next_job(self, kinds: List[str], now: datetime) -> Optional[JobStatus]:
+        """Mark the next due job as running and return it, or None if nothing is due"""
+        while True:
+            job_id = self.db.execute(next_job_query(kinds, now)).scalar()
+            if job_id is None:
+                self.db.rollback()
+                return None
+            claimed = self.db.execute(claim_job_statement(job_id, now)).rowcount
+            self.db.commit()
+            if claimed:
+                return self.get_job(job_id)
+    
+    def update_job(self, job_id: str, values: Dict[str, Any]) -> None:
+        """Write status, progress or outcome columns of a job"""
+        self.db.execute(update(Job).where(Job.job_id == job_id).values(**values))
+        self.db.commit()
+    
+    def heartbeat_jobs(self, job_ids: List[str], now: datetime) -> List[str]:
+        """Refresh running jobs' heartbeats and return those with a pending cancel request"""
+        self.db.execute(update(Job).where(Job.job_id.in_(job_ids)).values(heartbeat_at=now))
+        cancelled = self.db.execute(
+            select(Job.job_id).where(Job.job_id.in_(job_ids), Job.cancel_requested.is_(True))
+        ).scalars().all()
+        self.db.commit()
+        return list(cancelled)
+    
+    def requeue_stale_jobs(self, cutoff: datetime) -> int:
+        """Put back running jobs whose runner stopped heartbeating (e.g. the process died)"""
+        for statement in stale_job_statements(cutoff):
+            self.db.execute(statement)
+        requeued = self.db.execute(requeue_stale_statement(cutoff)).rowcount
+        self.db.commit()
+        return requeued
+    
+    def request_cancel(self, job_id: str, username: str) -> Optional[str]:
+        """Cancel a queued job, or flag a running one for its runner; returns the job's status"""
+        job = self.db.query(Job).filter(Job.job_id == job_id, Job.username == username).first()
+        if not job:
+            return None
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        elif job.status == "running":
+            job.cancel_requested = True
+        status = job.status
+        self.db.commit()
+        return status
@@ -0,0 +1,113 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import Job
+from app.models.job import JobStatus
+from app.services.repositories.jobs_repo_railway import (
+    build_job_status, next_job_query, claim_job_statement, list_jobs_query,
+    stale_job_statements, requeue_stale_statement
+)
+import json
+import uuid
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+
+class JobsRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_job(
+        self,
+        username: str,
+        kind: str,
+        payload: Any,
+        priority: int = 0,
+        max_attempts: int = 1
+    ) -> str:
+        """Queue a new job"""
+        job_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        self.db.add(Job(
+            job_id=job_id,
+            username=username,
+            kind=kind,
+            status="queued",
+            priority=priority,
+            payload=json.dumps(payload),
+            max_attempts=max_attempts,
+            run_after=now,
+            created_at=now
+        ))
+        await self.db.commit()
+        return job_id
+    
+    async def get_job(self, job_id: str, username: Optional[str] = None) -> Optional[JobStatus]:
+        """Get a specific job"""
+        query = select(Job).where(Job.job_id == job_id)
+        if username is not None:
+            query = query.where(Job.username == username)
+        result = await self.db.execute(query.execution_options(populate_existing=True))
+        job = result.scalars().first()
+        return build_job_status(job) if job else None
+    
+    async def list_jobs(
+        self,
+        username: str,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50
+    ) -> List[JobStatus]:
+        """Get the most recent jobs, newest first"""
+        result = await self.db.execute(list_jobs_query(username, status, kind, limit))
+        return [build_job_status(job) for job in result.scalars().all()]
+    
+    async def claim_next_job(self, kinds: List[str], now: datetime) -> Optional[JobStatus]:
+        """Mark the next due job as running and return it, or None if nothing is due"""
+        while True:
+            job_id = (await self.db.execute(next_job_query(kinds, now))).scalar()
+            if job_id is None:
+                await self.db.rollback()
+                return None
+            claimed = (await self.db.execute(claim_job_statement(job_id, now))).rowcount
+            await self.db.commit()
+            if claimed:
+                return await self.get_job(job_id)
+    
+    async def update_job(self, job_id: str, values: Dict[str, Any]) -> None:
+        """Write status, progress or outcome columns of a job"""
+        await self.db.execute(update(Job).where(Job.job_id == job_id).values(**values))
+        await self.db.commit()
+    
+    async def heartbeat_jobs(self, job_ids: List[str], now: datetime) -> List[str]:
+        """Refresh running jobs' heartbeats and return those with a pending cancel request"""
+        await self.db.execute(update(Job).where(Job.job_id.in_(job_ids)).values(heartbeat_at=now))
+        result = await self.db.execute(
+            select(Job.job_id).where(Job.job_id.in_(job_ids), Job.cancel_requested.is_(True))
+        )
+        cancelled = list(result.scalars().all())
+        await self.db.commit()
+        return cancelled
+    
+    async def requeue_stale_jobs(self, cutoff: datetime) -> int:
+        """Put back running jobs whose runner stopped heartbeating (e.g. the process died)"""
+        for statement in stale_job_statements(cutoff):
+            await self.db.execute(statement)
+        result = await self.db.execute(requeue_stale_statement(cutoff))
+        await self.db.commit()
+        return result.rowcount
+    
+    async def request_cancel(self, job_id: str, username: str) -> Optional[str]:
+        """Cancel a queued job, or flag a running one for its runner; returns the job's status"""
+        result = await self.db.execute(
+            select(Job).where(Job.job_id == job_id, Job.username == username)
+        )
+        job = result.scalars().first()
+        if not job:
+            return None
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        elif job.status == "running":
+            job.cancel_requested = True
+        status = job.status
+        await self.db.commit()
+        return status
@@ -1,24 +1,381 @@
+from sqlalchemy import select, update, delete, and_, case, cast, column, exists, func, literal, tuple_, Text
 from sqlalchemy.orm import Session
-from app.models.database import Plan
-from app.models.plan import WeekPlan, DayPlan, Workout
+from app.models.database import Plan, Client, Exercise, PlanExercise
+from app.models.plan import WeekPlan, DayPlan, Workout, WeekPlanPatch, WeekVolume, ExerciseVolume
+from app.models.plan_codec import plan_codec
+from app.models.plan_statements import (
+    plan_content_query, upsert_statements, plan_body_hash, body_refs_statements,
+    plan_exercise_names, insert_exercises_statements, exercise_ids_query, replace_plan_exercises_statements
+)
+from app.core.config import settings
+from app.services.exercise_index import exercise_index
 import json
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 
+def week_start_iso_for_offset(weekOffset: int) -> str:
+    """Monday of the current week shifted by weekOffset weeks, as YYYY-MM-DD"""
+    today = datetime.now()
+    current_week_start = today - timedelta(days=today.weekday())
+    target_week_start = current_week_start + timedelta(weeks=weekOffset)
+    return target_week_start.strftime("%Y-%m-%d")
+
+# JSON of a week without a plan
+EMPTY_PLAN_DATA = '{"days":[]}'
+
+def week_plan_json(client_id: str, week_start_iso: str, plan_data: Optional[str]) -> str:
+    """A WeekPlan JSON document around a plan's JSON text, without parsing it.
+
+    Plans are validated when they are written, so reads splice client_id and
+    week_start_iso in front of the stored object's members instead of
+    decoding, validating and re-encoding the whole plan. Rows stored in a
+    binary format are converted with plan_codec.to_json first.
+    """
+    head = '{"client_id":' + json.dumps(client_id) + ',"week_start_iso":' + json.dumps(week_start_iso)
+    members = (plan_data or EMPTY_PLAN_DATA).strip()[1:].lstrip()
+    if members.startswith('}'):
+        members = EMPTY_PLAN_DATA[1:]
+    return head + ',' + members
+
+def build_week_plans_json(rows, client_ids: List[str], week_start_isos: List[str]) -> str:
+    """JSON array counterpart of build_week_plans"""
+    found = {(row.client_id, row.week_start_iso): plan_codec.to_json(row.plan_data, row.plan_blob) for row in rows}
+    return '[' + ','.join(
+        week_plan_json(client_id, week_start_iso, found.get((client_id, week_start_iso)))
+        for client_id in client_ids
+        for week_start_iso in week_start_isos
+    ) + ']'
+
+def week_start_isos_for_offsets(offset_from: int, offset_to: int) -> List[str]:
+    """Mondays for every week offset from offset_from to offset_to inclusive, oldest first"""
+    today = datetime.now()
+    current_week_start = today - timedelta(days=today.weekday())
+    return [
+        (current_week_start + timedelta(weeks=offset)).strftime("%Y-%m-%d")
+        for offset in range(offset_from, offset_to + 1)
+    ]
+
+def week_plans_query(client_ids: List[str], week_start_isos: List[str]):
+    return plan_content_query(Plan.client_id, Plan.week_start_iso).where(
+        Plan.client_id.in_(client_ids),
+        Plan.week_start_iso.in_(week_start_isos)
+    )
+
+def build_week_plans(rows, client_ids: List[str], week_start_isos: List[str]) -> List[WeekPlan]:
+    """One WeekPlan per client and week, in request order; weeks without a row are empty"""
+    found = {(row.client_id, row.week_start_iso): row for row in rows}
+    plans = []
+    for client_id in client_ids:
+        for week_start_iso in week_start_isos:
+            row = found.get((client_id, week_start_iso))
+            plans.append(WeekPlan(
+                client_id=client_id,
+                week_start_iso=week_start_iso,
+                days=plan_codec.decode(row.plan_data, row.plan_blob).get('days', []) if row else []
+            ))
+    return plans
+
+def context_version_query(client_id: str, username: str, week_start_iso: str):
+    """Select only the change markers of a client and its plan for one week.
+
+    Yields no row when the client does not exist; the plan columns are
+    NULL when the client has no plan for that week.
+    """
+    return select(
+        Client.updated_at, Plan.id, Plan.created_at, Plan.updated_at
+    ).select_from(Client).outerjoin(
+        Plan, and_(Plan.client_id == Client.client_id, Plan.week_start_iso == week_start_iso)
+    ).where(
+        Client.client_id == client_id,
+        Client.username == username
+    ).order_by(Plan.id).limit(1)
+
+def week_plans_data(plans: List[WeekPlan]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Plan data to store per (client_id, week_start_iso); the last plan for a week wins"""
+    return {
+        (plan.client_id, plan.week_start_iso): {'days': [day.dict() for day in plan.days]}
+        for plan in plans
+    }
+
+def encode_plans(
+    plans: Dict[Tuple[str, str], Dict[str, Any]],
+    dedupe: bool
+) -> Tuple[Dict[Tuple[str, str], Dict[str, Any]], Dict[str, Tuple[str, Optional[bytes]]]]:
+    """Plan column values per (client_id, week_start_iso), and the encoded bodies they point at.
+
+    With dedupe, a plan row only carries the hash of its content and each
+    distinct content is encoded once; without it the row holds the plan.
+    """
+    values, bodies = {}, {}
+    for week, plan_data in plans.items():
+        if not dedupe:
+            stored_data, plan_blob = plan_codec.encode(plan_data)
+            values[week] = {"plan_data": stored_data, "plan_blob": plan_blob, "body_hash": None}
+            continue
+        body_hash = plan_body_hash(plan_data)
+        if body_hash not in bodies:
+            bodies[body_hash] = plan_codec.encode(plan_data)
+        values[week] = {"plan_data": "", "plan_blob": None, "body_hash": body_hash}
+    return values, bodies
+
+def template_plan_values(
+    source,
+    plan_data: Dict[str, Any],
+    weeks: List[Tuple[str, str]]
+) -> Tuple[Dict[Tuple[str, str], Dict[str, Any]], Dict[str, Tuple[str, Optional[bytes]]]]:
+    """encode_plans counterpart pointing every week at a source plan's body, stored as the source stores it"""
+    body_hash = source.body_hash or plan_body_hash(plan_data)
+    values = {week: {"plan_data": "", "plan_blob": None, "body_hash": body_hash} for week in weeks}
+    return values, {body_hash: (source.plan_data, source.plan_blob)}
+
+def claim_plans_statements(dialect_name: str, weeks: List[Tuple[str, str]]) -> List:
+    """Insert empty placeholder plans for (client_id, week_start_iso) weeks that have no row yet.
+
+    SELECT ... FOR UPDATE only locks rows that exist, so two first saves of
+    a week could both see no old body and one of the references would never
+    be dropped. With the row claimed first, the second save waits for the
+    first to commit and then reads the body it has to release.
+    """
+    return upsert_statements(dialect_name, Plan, ["client_id", "week_start_iso"], [
+        {"client_id": client_id, "week_start_iso": week_start_iso, "plan_data": ""}
+        for client_id, week_start_iso in sorted(weeks)
+    ])
+
+def body_hashes_query(weeks: List[Tuple[str, str]]):
+    """body_hash of the existing (client_id, week_start_iso) plans, locking their rows on Postgres"""
+    return select(Plan.body_hash).where(
+        tuple_(Plan.client_id, Plan.week_start_iso).in_(weeks)
+    ).with_for_update()
+
+def upsert_plans_statements(dialect_name: str, values: Dict[Tuple[str, str], Dict[str, Any]]) -> List:
+    """Upsert statements for encoded plans keyed by (client_id, week_start_iso).
+
+    Relies on the unique (client_id, week_start_iso) index, so concurrent
+    saves of the same week can never create a second row.
+    """
+    rows = [
+        {"client_id": client_id, "week_start_iso": week_start_iso, **plan_values}
+        for (client_id, week_start_iso), plan_values in values.items()
+    ]
+    return upsert_statements(
+        dialect_name, Plan, ["client_id", "week_start_iso"], rows,
+        replace=("plan_data", "plan_blob", "body_hash")
+    )
+
+def plan_exercise_lookups(plans: Dict[Tuple[str, str], Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Exercise names of the plans missing from the in-memory index, and ids of the rest"""
+    names = {}
+    for plan_data in plans.values():
+        for key, name in plan_exercise_names(plan_data).items():
+            names.setdefault(key, name)
+    ids = exercise_index.ids_for(names)
+    missing = {key: name for key, name in names.items() if key not in ids}
+    return missing, ids
+
+def week_volume_query(client_id: str, week_start_isos: List[str]):
+    """Exercise volume rows of one client over a range of weeks, read from the ix_plan_exercises index"""
+    return select(
+        PlanExercise.week_start_iso, PlanExercise.exercise_id, Exercise.name, PlanExercise.sets, PlanExercise.reps
+    ).join(Exercise, Exercise.id == PlanExercise.exercise_id).where(
+        PlanExercise.client_id == client_id,
+        PlanExercise.week_start_iso.between(week_start_isos[0], week_start_isos[-1])
+    ).order_by(PlanExercise.week_start_iso, PlanExercise.reps.desc(), Exercise.name)
+
+def build_week_volumes(rows, week_start_isos: List[str]) -> List[WeekVolume]:
+    """One WeekVolume per week in the range, oldest first; weeks without a plan have zero volume"""
+    weeks = {week_start_iso: WeekVolume(week_start_iso=week_start_iso) for week_start_iso in week_start_isos}
+    for row in rows:
+        week = weeks[row.week_start_iso]
+        week.sets += row.sets or 0
+        week.reps += row.reps or 0
+        week.exercises.append(ExerciseVolume(
+            exercise_id=row.exercise_id, name=row.name, sets=row.sets or 0, reps=row.reps or 0
+        ))
+    return list(weeks.values())
+
+def patch_changes_exercises(patch: WeekPlanPatch) -> bool:
+    """Whether the patch can change the plan's exercise rows: names, sets or reps"""
+    return bool(patch.days) or any(
+        edit.exercise is not None or edit.sets is not None or edit.reps is not None
+        for edit in patch.workouts
+    )
+
+# Attempts at a read-modify-write patch before giving up on a plan that keeps changing
+PATCH_RETRIES = 5
+
+class PlanPatchConflict(Exception):
+    """A plan was changed by other writers on every patch attempt"""
+
+def apply_plan_patch(plan_data: Dict[str, Any], patch: WeekPlanPatch) -> Optional[Dict[str, Any]]:
+    """Apply a patch to decoded plan data; None if an edit names a missing day or workout"""
+    days = list(plan_data.get('days', []))
+    positions = {day.get('day'): i for i, day in enumerate(days)}
+    for day in patch.days:
+        if day.day in positions:
+            days[positions[day.day]] = day.dict()
+        else:
+            positions[day.day] = len(days)
+            days.append(day.dict())
+    for workout_edit in patch.workouts:
+        position = positions.get(workout_edit.day)
+        if position is None:
+            return None
+        workouts = days[position].get('workouts', [])
+        if workout_edit.index >= len(workouts):
+            return None
+        workouts[workout_edit.index].update(workout_edit.changes())
+    return {**plan_data, 'days': days}
+
+def patch_plan_statement(client_id: str, week_start_iso: str, patch: WeekPlanPatch):
+    """A single Postgres UPDATE applying the patch to plan_data with JSONB functions.
+
+    Replaced days are swapped in place (or appended), and workout edits
+    become jsonb_set calls on the stored day. The statement matches no row
+    when the plan does not exist, is stored in plan_blob or a shared body
+    rather than as JSON text, or an edit names a missing day or workout.
+    Returns None if an edit does not fit a day replaced by the same patch.
+    """
+    from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array, aggregate_order_by
+
+    def jsonb(value):
+        # Bind as text and cast; a JSONB-typed bind would serialize the value a second time
+        return cast(literal(json.dumps(value), Text), JSONB)
+
+    replaced = {day.day for day in patch.days}
+    # Edits on days this patch replaces are folded into the replacement up front
+    replacements = apply_plan_patch({'days': []}, WeekPlanPatch(
+        week_start_iso=week_start_iso,
+        days=patch.days,
+        workouts=[edit for edit in patch.workouts if edit.day in replaced]
+    ))
+    if replacements is None:
+        return None
+    edits: Dict[str, List] = {}
+    for workout_edit in patch.workouts:
+        if workout_edit.day not in replaced:
+            edits.setdefault(workout_edit.day, []).append(workout_edit)
+
+    def stored_days(name: str):
+        # nullif keeps the WHERE subqueries from casting the "" of plan_blob rows
+        return func.jsonb_array_elements(
+            func.coalesce(cast(func.nullif(Plan.plan_data, ''), JSONB)['days'], jsonb([]))
+        ).table_valued(column('value', JSONB), with_ordinality='ordinality').render_derived(name=name)
+
+    stored = stored_days('stored')
+    whens = [
+        (stored.c.value['day'].astext == day['day'], jsonb(day))
+        for day in replacements['days']
+    ]
+    for day_name, day_edits in edits.items():
+        day = stored.c.value
+        for workout_edit in day_edits:
+            for field, value in workout_edit.changes().items():
+                path = cast(array(['workouts', str(workout_edit.index), field]), ARRAY(Text))
+                day = func.jsonb_set(day, path, jsonb(value))
+        whens.append((stored.c.value['day'].astext == day_name, day))
+    element = case(*whens, else_=stored.c.value) if whens else stored.c.value
+    merged = select(
+        func.coalesce(func.jsonb_agg(aggregate_order_by(element, stored.c.ordinality)), jsonb([]))
+    ).scalar_subquery()
+
+    existing = stored_days('existing')
+    new_days = func.jsonb_array_elements(
+        jsonb(replacements['days'])
+    ).table_valued(column('value', JSONB)).render_derived(name='new_days')
+    appended = select(
+        func.coalesce(func.jsonb_agg(new_days.c.value), jsonb([]))
+    ).where(
+        new_days.c.value['day'].astext.not_in(select(existing.c.value['day'].astext))
+    ).scalar_subquery()
+
+    days_path = cast(array(['days']), ARRAY(Text))
+    statement = update(Plan).where(
+        Plan.client_id == client_id,
+        Plan.week_start_iso == week_start_iso,
+        Plan.plan_blob.is_(None),
+        Plan.body_hash.is_(None)
+    ).values(
+        plan_data=cast(func.jsonb_set(cast(Plan.plan_data, JSONB), days_path, merged.op('||')(appended)), Text)
+    )
+    for day_name, day_edits in edits.items():
+        target = stored_days('target')
+        statement = statement.where(exists(select(1).select_from(target).where(
+            target.c.value['day'].astext == day_name,
+            func.jsonb_array_length(target.c.value['workouts']) > max(edit.index for edit in day_edits)
+        )))
+    return statement
+
 class PlansRepositoryRailway:
     def __init__(self, db: Session):
         self.db = db
     
+    def _index_exercises(self, plans: Dict[Tuple[str, str], Dict[str, Any]]) -> List:
+        """Intern the plans' exercise names and rewrite their reverse-index rows; the caller commits.
+
+        Names the in-memory index already knows cost no catalog queries.
+        Returns the catalog rows that had to be looked up.
+        """
+        missing, ids = plan_exercise_lookups(plans)
+        rows = []
+        if missing:
+            for statement in insert_exercises_statements(self.db.get_bind().dialect.name, missing):
+                self.db.execute(statement)
+            rows = self.db.execute(exercise_ids_query(list(missing))).all()
+            ids.update((row.name_key, row.id) for row in rows)
+        for statement in replace_plan_exercises_statements(plans, ids):
+            self.db.execute(statement)
+        return rows
+    
+    def _commit_indexed(self, exercises: List) -> None:
+        """Commit, then make newly interned exercises searchable"""
+        self.db.commit()
+        exercise_index.add_many((row.id, row.name) for row in exercises)
+    
+    def _store_plans(
+        self,
+        plans: Dict[Tuple[str, str], Dict[str, Any]],
+        values: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+        bodies: Optional[Dict[str, Tuple[str, Optional[bytes]]]] = None
+    ) -> List:
+        """Upsert plans with their bodies and exercise rows; the caller commits.
+
+        values and bodies default to encode_plans under PLAN_STORAGE_DEDUPE.
+        The weeks' rows are claimed and locked first so the references they
+        drop are known exactly. Returns the catalog rows _index_exercises
+        looked up.
+        """
+        if values is None:
+            values, bodies = encode_plans(plans, settings.PLAN_STORAGE_DEDUPE)
+        dialect_name = self.db.get_bind().dialect.name
+        for statement in claim_plans_statements(dialect_name, list(values)):
+            self.db.execute(statement)
+        old_hashes = self.db.execute(body_hashes_query(list(values))).scalars().all()
+        before, after = body_refs_statements(
+            dialect_name, bodies, [plan_values["body_hash"] for plan_values in values.values()], old_hashes
+        )
+        for statement in before:
+            self.db.execute(statement)
+        for statement in upsert_plans_statements(dialect_name, values):
+            self.db.execute(statement)
+        for statement in after:
+            self.db.execute(statement)
+        return self._index_exercises(plans)
+    
     def create_plan(self, client_id: str, week_start_iso: str, plan_data: Dict[str, Any]) -> int:
         """Create a new plan"""
+        values, bodies = encode_plans({(client_id, week_start_iso): plan_data}, settings.PLAN_STORAGE_DEDUPE)
         plan = Plan(
             client_id=client_id,
             week_start_iso=week_start_iso,
-            plan_data=json.dumps(plan_data)
+            **values[(client_id, week_start_iso)]
         )
         
+        before, _ = body_refs_statements(self.db.get_bind().dialect.name, bodies, [plan.body_hash], [])
+        for statement in before:
+            self.db.execute(statement)
         self.db.add(plan)
-        self.db.commit()
+        exercises = self._index_exercises({(client_id, week_start_iso): plan_data})
+        self._commit_indexed(exercises)
         self.db.refresh(plan)
         
         return plan.id
@@ -31,6 +388,12 @@ class PlansRepositoryRailway:
         """Get a specific plan"""
         return self.db.query(Plan).filter(Plan.id == plan_id).first()
     
+    def _locked_plan(self, plan_id: int) -> Optional[Plan]:
+        """A plan re-read under a row lock, so the body_hash it drops is still current at commit"""
+        return self.db.execute(
+            select(Plan).where(Plan.id == plan_id).with_for_update().execution_options(populate_existing=True)
+        ).scalars().first()
+    
     def get_plan_by_week(self, client_id: str, week_start_iso: str) -> Optional[Plan]:
         """Get a plan by client and week"""
         return self.db.query(Plan).filter(
@@ -40,40 +403,56 @@ class PlansRepositoryRailway:
     
     def update_plan(self, plan_id: int, plan_data: Dict[str, Any]) -> bool:
         """Update a plan"""
-        plan = self.get_plan(plan_id)
+        plan = self._locked_plan(plan_id)
         if not plan:
             return False
         
-        plan.plan_data = json.dumps(plan_data)
-        self.db.commit()
+        week = (plan.client_id, plan.week_start_iso)
+        values, bodies = encode_plans({week: plan_data}, settings.PLAN_STORAGE_DEDUPE)
+        before, after = body_refs_statements(
+            self.db.get_bind().dialect.name, bodies, [values[week]["body_hash"]], [plan.body_hash]
+        )
+        for statement in before:
+            self.db.execute(statement)
+        plan.plan_data, plan.plan_blob, plan.body_hash = (
+            values[week]["plan_data"], values[week]["plan_blob"], values[week]["body_hash"]
+        )
+        for statement in after:
+            self.db.execute(statement)
+        exercises = self._index_exercises({week: plan_data})
+        self._commit_indexed(exercises)
         self.db.refresh(plan)
         return True
     
     def delete_plan(self, plan_id: int) -> bool:
         """Delete a plan"""
-        plan = self.get_plan(plan_id)
+        plan = self._locked_plan(plan_id)
         if not plan:
             return False
         
+        _, after = body_refs_statements(self.db.get_bind().dialect.name, {}, [], [plan.body_hash])
+        self._index_exercises({(plan.client_id, plan.week_start_iso): {}})
         self.db.delete(plan)
+        for statement in after:
+            self.db.execute(statement)
         self.db.commit()
         return True
     
     def get_week_plan(self, client_id: str, weekOffset: int) -> WeekPlan:
         """Get week plan for a client with offset"""
-        # Calculate the target week start date
-        today = datetime.now()
-        days_since_monday = today.weekday()
-        current_week_start = today - timedelta(days=days_since_monday)
-        target_week_start = current_week_start + timedelta(weeks=weekOffset)
-        week_start_iso = target_week_start.strftime("%Y-%m-%d")
+        week_start_iso = week_start_iso_for_offset(weekOffset)
         
         # Try to get existing plan
-        plan = self.get_plan_by_week(client_id, week_start_iso)
+        plan = self.db.execute(
+            plan_content_query().where(
+                Plan.client_id == client_id,
+                Plan.week_start_iso == week_start_iso
+            )
+        ).first()
         
         if plan:
             # Return existing plan
-            plan_data = json.loads(plan.plan_data)
+            plan_data = plan_codec.decode(plan.plan_data, plan.plan_blob)
             return WeekPlan(
                 client_id=client_id,
                 week_start_iso=week_start_iso,
@@ -87,29 +466,156 @@ class PlansRepositoryRailway:
                 days=[]
             )
     
-    def save_week_plan(self, plan: WeekPlan) -> bool:
-        """Save or update a week plan"""
-        try:
-            # Check if plan already exists
-            existing_plan = self.get_plan_by_week(plan.client_id, plan.week_start_iso)
-            
-            if existing_plan:
-                # Update existing plan
-                existing_plan.plan_data = json.dumps({'days': [day.dict() for day in plan.days]})
+    def get_week_plan_json(self, client_id: str, weekOffset: int) -> str:
+        """Get a week plan as a ready-to-send JSON document (see week_plan_json)"""
+        week_start_iso = week_start_iso_for_offset(weekOffset)
+        row = self.db.execute(
+            plan_content_query().where(
+                Plan.client_id == client_id,
+                Plan.week_start_iso == week_start_iso
+            )
+        ).first()
+        return week_plan_json(client_id, week_start_iso, plan_codec.to_json(*row) if row else None)
+    
+    def get_week_plans_json(self, client_ids: List[str], offset_from: int, offset_to: int) -> str:
+        """Get a range of week plans as a ready-to-send JSON array"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        rows = self.db.execute(week_plans_query(client_ids, week_start_isos)).all()
+        return build_week_plans_json(rows, client_ids, week_start_isos)
+    
+    def get_week_plans(self, client_ids: List[str], offset_from: int, offset_to: int) -> List[WeekPlan]:
+        """Get week plans for several clients and a range of week offsets in one query"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        rows = self.db.execute(week_plans_query(client_ids, week_start_isos)).all()
+        return build_week_plans(rows, client_ids, week_start_isos)
+    
+    def get_week_volumes(self, client_id: str, offset_from: int, offset_to: int) -> List[WeekVolume]:
+        """Get a client's training volume per week and exercise from the precomputed rows"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        rows = self.db.execute(week_volume_query(client_id, week_start_isos)).all()
+        return build_week_volumes(rows, week_start_isos)
+    
+    def get_context_version(self, client_id: str, username: str, week_start_iso: str) -> Optional[Tuple]:
+        """Get the client/plan change markers for one week, or None if the client does not exist"""
+        row = self.db.execute(context_version_query(client_id, username, week_start_iso)).first()
+        return tuple(row) if row else None
+    
+    def save_week_plans(self, plans: List[WeekPlan]) -> int:
+        """Save or update many week plans with one upsert, in one transaction with their bodies and exercise index rows"""
+        if not plans:
+            return 0
+        exercises = self._store_plans(week_plans_data(plans))
+        self._commit_indexed(exercises)
+        return len(plans)
+    
+    def apply_plan_template(self, client_ids: List[str], week_start_iso: str, plan_data: Dict[str, Any]) -> int:
+        """Give every client the same plan for a week, as rows sharing one stored body"""
+        plans = {(client_id, week_start_iso): plan_data for client_id in client_ids}
+        values, bodies = encode_plans(plans, dedupe=True)
+        exercises = self._store_plans(plans, values, bodies)
+        self._commit_indexed(exercises)
+        return len(plans)
+    
+    def copy_week_plan(
+        self,
+        source_client_id: str,
+        source_week_start_iso: str,
+        client_ids: List[str],
+        week_start_iso: str
+    ) -> Optional[int]:
+        """Point the clients' week at an existing plan's body without re-encoding it; None if the source does not exist"""
+        source = self.db.execute(
+            plan_content_query(Plan.body_hash).where(
+                Plan.client_id == source_client_id,
+                Plan.week_start_iso == source_week_start_iso
+            )
+        ).first()
+        if source is None:
+            return None
+        plan_data = plan_codec.decode(source.plan_data, source.plan_blob)
+        plans = {(client_id, week_start_iso): plan_data for client_id in client_ids}
+        values, bodies = template_plan_values(source, plan_data, list(plans))
+        exercises = self._store_plans(plans, values, bodies)
+        self._commit_indexed(exercises)
+        return len(plans)
+    
+    def patch_week_plan(self, client_id: str, week_start_iso: str, patch: WeekPlanPatch) -> bool:
+        """Apply day replacements and workout edits to a stored plan.
+
+        On Postgres with JSON text storage and no deduplication this is one
+        UPDATE evaluated in the database. Otherwise, or when that statement
+        matches nothing, the plan is patched in Python and written back only
+        if no one else changed it meanwhile; a plan sharing a body gets a body
+        of its own. Returns False if there is no plan for the week or an edit
+        names a missing day or workout.
+        """
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name == "postgresql" and not plan_codec.binary and not settings.PLAN_STORAGE_DEDUPE:
+            statement = patch_plan_statement(client_id, week_start_iso, patch)
+            if statement is None:
+                return False
+            if not patch_changes_exercises(patch):
+                updated = self.db.execute(statement).rowcount
                 self.db.commit()
-                self.db.refresh(existing_plan)
+                if updated:
+                    return True
             else:
-                # Create new plan
-                new_plan = Plan(
-                    client_id=plan.client_id,
-                    week_start_iso=plan.week_start_iso,
-                    plan_data=json.dumps({'days': [day.dict() for day in plan.days]})
-                )
-                self.db.add(new_plan)
+                # The new exercise names are only known once the database has applied the patch
+                row = self.db.execute(statement.returning(Plan.plan_data)).first()
+                if row:
+                    exercises = self._index_exercises({(client_id, week_start_iso): json.loads(row.plan_data)})
+                    self._commit_indexed(exercises)
+                    return True
                 self.db.commit()
-                self.db.refresh(new_plan)
-            
+        
+        week = (client_id, week_start_iso)
+        for _ in range(PATCH_RETRIES):
+            row = self.db.execute(
+                plan_content_query(
+                    Plan.id, Plan.body_hash, Plan.plan_data.label("inline_data"), Plan.plan_blob.label("inline_blob")
+                ).where(
+                    Plan.client_id == client_id,
+                    Plan.week_start_iso == week_start_iso
+                )
+            ).first()
+            plan_data = apply_plan_patch(plan_codec.decode(row.plan_data, row.plan_blob), patch) if row else None
+            if plan_data is None:
+                self.db.rollback()
+                return False
+            values, bodies = encode_plans({week: plan_data}, settings.PLAN_STORAGE_DEDUPE)
+            before, after = body_refs_statements(dialect_name, bodies, [values[week]["body_hash"]], [row.body_hash])
+            for statement in before:
+                self.db.execute(statement)
+            updated = self.db.execute(
+                update(Plan).where(
+                    Plan.id == row.id,
+                    Plan.body_hash == row.body_hash,
+                    Plan.plan_data == row.inline_data,
+                    Plan.plan_blob == row.inline_blob
+                ).values(**values[week])
+            ).rowcount
+            if updated:
+                for statement in after:
+                    self.db.execute(statement)
+                exercises = self._index_exercises({week: plan_data})
+                self._commit_indexed(exercises)
+                return True
+            # Also takes back the references added for this attempt
+            self.db.rollback()
+        raise PlanPatchConflict("Week plan kept changing while being patched; try again")
+    
+    def release(self) -> None:
+        """End the read transaction so the pooled connection is returned before a slow call"""
+        self.db.rollback()
+    
+    def save_week_plan(self, plan: WeekPlan) -> bool:
+        """Save or update a week plan"""
+        try:
+            # Insert or overwrite in one statement; the unique index rules out duplicates
+            exercises = self._store_plans(week_plans_data([plan]))
+            self._commit_indexed(exercises)
             return True
         except Exception as e:
             print(f"Error saving week plan: {e}")
+            self.db.rollback()
             return False
@@ -0,0 +1,319 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import Plan
+from app.models.plan import WeekPlan, WeekPlanPatch, WeekVolume
+from app.core.config import settings
+from app.models.plan_codec import plan_codec
+from app.services.exercise_index import exercise_index
+from app.services.repositories.plans_repo_railway import (
+    week_start_iso_for_offset, week_start_isos_for_offsets, week_plans_query, build_week_plans,
+    week_plan_json, build_week_plans_json,
+    context_version_query, week_plans_data, upsert_plans_statements,
+    encode_plans, template_plan_values, claim_plans_statements, body_hashes_query,
+    apply_plan_patch, patch_plan_statement, patch_changes_exercises, PATCH_RETRIES, PlanPatchConflict,
+    plan_exercise_lookups, week_volume_query, build_week_volumes
+)
+from app.models.plan_statements import (
+    plan_content_query, body_refs_statements,
+    insert_exercises_statements, exercise_ids_query, replace_plan_exercises_statements
+)
+import json
+from typing import List, Optional, Dict, Any, Tuple
+
+class PlansRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _index_exercises(self, plans: Dict[Tuple[str, str], Dict[str, Any]]) -> List:
+        """Intern the plans' exercise names and rewrite their reverse-index rows (see the sync repository)"""
+        missing, ids = plan_exercise_lookups(plans)
+        rows = []
+        if missing:
+            for statement in insert_exercises_statements(self.db.get_bind().dialect.name, missing):
+                await self.db.execute(statement)
+            rows = (await self.db.execute(exercise_ids_query(list(missing)))).all()
+            ids.update((row.name_key, row.id) for row in rows)
+        for statement in replace_plan_exercises_statements(plans, ids):
+            await self.db.execute(statement)
+        return rows
+    
+    async def _commit_indexed(self, exercises: List) -> None:
+        """Commit, then make newly interned exercises searchable"""
+        await self.db.commit()
+        exercise_index.add_many((row.id, row.name) for row in exercises)
+    
+    async def _store_plans(
+        self,
+        plans: Dict[Tuple[str, str], Dict[str, Any]],
+        values: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+        bodies: Optional[Dict[str, Tuple[str, Optional[bytes]]]] = None
+    ) -> List:
+        """Upsert plans with their bodies and exercise rows (see the sync repository)"""
+        if values is None:
+            values, bodies = encode_plans(plans, settings.PLAN_STORAGE_DEDUPE)
+        dialect_name = self.db.get_bind().dialect.name
+        for statement in claim_plans_statements(dialect_name, list(values)):
+            await self.db.execute(statement)
+        old_hashes = (await self.db.execute(body_hashes_query(list(values)))).scalars().all()
+        before, after = body_refs_statements(
+            dialect_name, bodies, [plan_values["body_hash"] for plan_values in values.values()], old_hashes
+        )
+        for statement in before:
+            await self.db.execute(statement)
+        for statement in upsert_plans_statements(dialect_name, values):
+            await self.db.execute(statement)
+        for statement in after:
+            await self.db.execute(statement)
+        return await self._index_exercises(plans)
+    
+    async def create_plan(self, client_id: str, week_start_iso: str, plan_data: Dict[str, Any]) -> int:
+        """Create a new plan"""
+        values, bodies = encode_plans({(client_id, week_start_iso): plan_data}, settings.PLAN_STORAGE_DEDUPE)
+        plan = Plan(
+            client_id=client_id,
+            week_start_iso=week_start_iso,
+            **values[(client_id, week_start_iso)]
+        )
+        
+        before, _ = body_refs_statements(self.db.get_bind().dialect.name, bodies, [plan.body_hash], [])
+        for statement in before:
+            await self.db.execute(statement)
+        self.db.add(plan)
+        exercises = await self._index_exercises({(client_id, week_start_iso): plan_data})
+        await self._commit_indexed(exercises)
+        await self.db.refresh(plan)
+        
+        return plan.id
+    
+    async def get_plans(self, client_id: str) -> List[Plan]:
+        """Get all plans for a client"""
+        result = await self.db.execute(select(Plan).where(Plan.client_id == client_id))
+        return list(result.scalars().all())
+    
+    async def get_plan(self, plan_id: int) -> Optional[Plan]:
+        """Get a specific plan"""
+        result = await self.db.execute(select(Plan).where(Plan.id == plan_id))
+        return result.scalars().first()
+    
+    async def _locked_plan(self, plan_id: int) -> Optional[Plan]:
+        """A plan re-read under a row lock (see the sync repository)"""
+        result = await self.db.execute(
+            select(Plan).where(Plan.id == plan_id).with_for_update().execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+    
+    async def get_plan_by_week(self, client_id: str, week_start_iso: str) -> Optional[Plan]:
+        """Get a plan by client and week"""
+        result = await self.db.execute(
+            select(Plan).where(
+                Plan.client_id == client_id,
+                Plan.week_start_iso == week_start_iso
+            )
+        )
+        return result.scalars().first()
+    
+    async def update_plan(self, plan_id: int, plan_data: Dict[str, Any]) -> bool:
+        """Update a plan"""
+        plan = await self._locked_plan(plan_id)
+        if not plan:
+            return False
+        
+        week = (plan.client_id, plan.week_start_iso)
+        values, bodies = encode_plans({week: plan_data}, settings.PLAN_STORAGE_DEDUPE)
+        before, after = body_refs_statements(
+            self.db.get_bind().dialect.name, bodies, [values[week]["body_hash"]], [plan.body_hash]
+        )
+        for statement in before:
+            await self.db.execute(statement)
+        plan.plan_data, plan.plan_blob, plan.body_hash = (
+            values[week]["plan_data"], values[week]["plan_blob"], values[week]["body_hash"]
+        )
+        for statement in after:
+            await self.db.execute(statement)
+        exercises = await self._index_exercises({week: plan_data})
+        await self._commit_indexed(exercises)
+        await self.db.refresh(plan)
+        return True
+    
+    async def delete_plan(self, plan_id: int) -> bool:
+        """Delete a plan"""
+        plan = await self._locked_plan(plan_id)
+        if not plan:
+            return False
+        
+        _, after = body_refs_statements(self.db.get_bind().dialect.name, {}, [], [plan.body_hash])
+        await self._index_exercises({(plan.client_id, plan.week_start_iso): {}})
+        await self.db.delete(plan)
+        for statement in after:
+            await self.db.execute(statement)
+        await self.db.commit()
+        return True
+    
+    async def get_week_plan(self, client_id: str, weekOffset: int) -> WeekPlan:
+        """Get week plan for a client with offset"""
+        week_start_iso = week_start_iso_for_offset(weekOffset)
+        
+        result = await self.db.execute(
+            plan_content_query().where(
+                Plan.client_id == client_id,
+                Plan.week_start_iso == week_start_iso
+            )
+        )
+        plan = result.first()
+        
+        days = plan_codec.decode(plan.plan_data, plan.plan_blob).get('days', []) if plan else []
+        return WeekPlan(
+            client_id=client_id,
+            week_start_iso=week_start_iso,
+            days=days
+        )
+    
+    async def get_week_plan_json(self, client_id: str, weekOffset: int) -> str:
+        """Get a week plan as a ready-to-send JSON document (see week_plan_json)"""
+        week_start_iso = week_start_iso_for_offset(weekOffset)
+        result = await self.db.execute(
+            plan_content_query().where(
+                Plan.client_id == client_id,
+                Plan.week_start_iso == week_start_iso
+            )
+        )
+        row = result.first()
+        return week_plan_json(client_id, week_start_iso, plan_codec.to_json(*row) if row else None)
+    
+    async def get_week_plans_json(self, client_ids: List[str], offset_from: int, offset_to: int) -> str:
+        """Get a range of week plans as a ready-to-send JSON array"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        result = await self.db.execute(week_plans_query(client_ids, week_start_isos))
+        return build_week_plans_json(result.all(), client_ids, week_start_isos)
+    
+    async def get_week_plans(self, client_ids: List[str], offset_from: int, offset_to: int) -> List[WeekPlan]:
+        """Get week plans for several clients and a range of week offsets in one query"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        result = await self.db.execute(week_plans_query(client_ids, week_start_isos))
+        return build_week_plans(result.all(), client_ids, week_start_isos)
+    
+    async def get_week_volumes(self, client_id: str, offset_from: int, offset_to: int) -> List[WeekVolume]:
+        """Get a client's training volume per week and exercise from the precomputed rows"""
+        week_start_isos = week_start_isos_for_offsets(offset_from, offset_to)
+        rows = (await self.db.execute(week_volume_query(client_id, week_start_isos))).all()
+        return build_week_volumes(rows, week_start_isos)
+    
+    async def get_context_version(self, client_id: str, username: str, week_start_iso: str) -> Optional[Tuple]:
+        """Get the client/plan change markers for one week, or None if the client does not exist"""
+        result = await self.db.execute(context_version_query(client_id, username, week_start_iso))
+        row = result.first()
+        return tuple(row) if row else None
+    
+    async def save_week_plans(self, plans: List[WeekPlan]) -> int:
+        """Save or update many week plans with one upsert, in one transaction with their bodies and exercise index rows"""
+        if not plans:
+            return 0
+        exercises = await self._store_plans(week_plans_data(plans))
+        await self._commit_indexed(exercises)
+        return len(plans)
+    
+    async def apply_plan_template(self, client_ids: List[str], week_start_iso: str, plan_data: Dict[str, Any]) -> int:
+        """Give every client the same plan for a week, as rows sharing one stored body"""
+        plans = {(client_id, week_start_iso): plan_data for client_id in client_ids}
+        values, bodies = encode_plans(plans, dedupe=True)
+        exercises = await self._store_plans(plans, values, bodies)
+        await self._commit_indexed(exercises)
+        return len(plans)
+    
+    async def copy_week_plan(
+        self,
+        source_client_id: str,
+        source_week_start_iso: str,
+        client_ids: List[str],
+        week_start_iso: str
+    ) -> Optional[int]:
+        """Point the clients' week at an existing plan's body without re-encoding it; None if the source does not exist"""
+        result = await self.db.execute(
+            plan_content_query(Plan.body_hash).where(
+                Plan.client_id == source_client_id,
+                Plan.week_start_iso == source_week_start_iso
+            )
+        )
+        source = result.first()
+        if source is None:
+            return None
+        plan_data = plan_codec.decode(source.plan_data, source.plan_blob)
+        plans = {(client_id, week_start_iso): plan_data for client_id in client_ids}
+        values, bodies = template_plan_values(source, plan_data, list(plans))
+        exercises = await self._store_plans(plans, values, bodies)
+        await self._commit_indexed(exercises)
+        return len(plans)
+    
+    async def patch_week_plan(self, client_id: str, week_start_iso: str, patch: WeekPlanPatch) -> bool:
+        """Apply day replacements and workout edits to a stored plan (see the sync repository)"""
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name == "postgresql" and not plan_codec.binary and not settings.PLAN_STORAGE_DEDUPE:
+            statement = patch_plan_statement(client_id, week_start_iso, patch)
+            if statement is None:
+                return False
+            if not patch_changes_exercises(patch):
+                result = await self.db.execute(statement)
+                await self.db.commit()
+                if result.rowcount:
+                    return True
+            else:
+                # The new exercise names are only known once the database has applied the patch
+                row = (await self.db.execute(statement.returning(Plan.plan_data))).first()
+                if row:
+                    exercises = await self._index_exercises({(client_id, week_start_iso): json.loads(row.plan_data)})
+                    await self._commit_indexed(exercises)
+                    return True
+                await self.db.commit()
+        
+        week = (client_id, week_start_iso)
+        for _ in range(PATCH_RETRIES):
+            result = await self.db.execute(
+                plan_content_query(
+                    Plan.id, Plan.body_hash, Plan.plan_data.label("inline_data"), Plan.plan_blob.label("inline_blob")
+                ).where(
+                    Plan.client_id == client_id,
+                    Plan.week_start_iso == week_start_iso
+                )
+            )
+            row = result.first()
+            plan_data = apply_plan_patch(plan_codec.decode(row.plan_data, row.plan_blob), patch) if row else None
+            if plan_data is None:
+                await self.db.rollback()
+                return False
+            values, bodies = encode_plans({week: plan_data}, settings.PLAN_STORAGE_DEDUPE)
+            before, after = body_refs_statements(dialect_name, bodies, [values[week]["body_hash"]], [row.body_hash])
+            for statement in before:
+                await self.db.execute(statement)
+            result = await self.db.execute(
+                update(Plan).where(
+                    Plan.id == row.id,
+                    Plan.body_hash == row.body_hash,
+                    Plan.plan_data == row.inline_data,
+                    Plan.plan_blob == row.inline_blob
+                ).values(**values[week])
+            )
+            if result.rowcount:
+                for statement in after:
+                    await self.db.execute(statement)
+                exercises = await self._index_exercises({week: plan_data})
+                await self._commit_indexed(exercises)
+                return True
+            # Also takes back the references added for this attempt
+            await self.db.rollback()
+        raise PlanPatchConflict("Week plan kept changing while being patched; try again")
+    
+    async def release(self) -> None:
+        """End the read transaction so the pooled connection is returned before a slow call"""
+        await self.db.rollback()
+    
+    async def save_week_plan(self, plan: WeekPlan) -> bool:
+        """Save or update a week plan"""
+        try:
+            # Insert or overwrite in one statement; the unique index rules out duplicates
+            exercises = await self._store_plans(week_plans_data([plan]))
+            await self._commit_indexed(exercises)
+            return True
+        except Exception as e:
+            print(f"Error saving week plan: {e}")
+            await self.db.rollback()
+            return False
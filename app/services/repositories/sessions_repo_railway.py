@@ -1,11 +1,70 @@
+from sqlalchemy import select, tuple_, func
 from sqlalchemy.orm import Session
-from app.models.database import Session as SessionModel
-from app.models.session import SessionCreate, SessionUpdate
+from app.models.database import Session as SessionModel, Client, SESSION_PROMOTED_FIELDS
+from app.models.session import Session as SessionSchema, SessionCreate, SessionUpdate
 import json
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date
 
+def sessions_range_query(
+    username: str,
+    date_from: str,
+    date_to: str,
+    limit: int,
+    after: Optional[List[str]] = None,
+    status: Optional[str] = None,
+    client_id: Optional[str] = None
+):
+    """Select sessions in [date_from, date_to] ordered by (date, time, session_id), a missing time first.
+
+    ``after`` is the (date, time, session_id) key of the last row already
+    returned; one extra row is fetched so callers can tell whether more remain.
+    """
+    # Backfilled legacy rows may have no time; NULL would drop out of the keyset comparison
+    session_time = func.coalesce(SessionModel.time, '')
+    query = select(SessionModel, Client.name).outerjoin(
+        Client, Client.client_id == SessionModel.client_id
+    ).where(
+        SessionModel.username == username,
+        SessionModel.date >= date_from,
+        SessionModel.date <= date_to
+    )
+    if after:
+        query = query.where(
+            tuple_(SessionModel.date, session_time, SessionModel.session_id) > tuple_(*after)
+        )
+    if status:
+        query = query.where(SessionModel.status == status)
+    if client_id:
+        query = query.where(SessionModel.client_id == client_id)
+    return query.order_by(
+        SessionModel.date, session_time, SessionModel.session_id
+    ).limit(limit + 1)
+
+def build_sessions_page(rows, limit: int) -> Tuple[List[SessionSchema], Optional[List[str]]]:
+    """Turn (SessionModel, client name) rows into a page and the key to continue from"""
+    sessions = []
+    for session, client_name in rows[:limit]:
+        data = json.loads(session.session_data)
+        sessions.append(SessionSchema(
+            session_id=session.session_id,
+            client_id=session.client_id or "",
+            client_name=client_name or data.get("client_name", ""),
+            date=session.date,
+            time=session.time or "",
+            status=session.status or "scheduled",
+            notes=data.get("notes"),
+            created_at=session.created_at.isoformat() if session.created_at else "",
+            updated_at=session.updated_at.isoformat() if session.updated_at else ""
+        ))
+    
+    next_key = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_key = [last.date, last.time or "", last.session_id]
+    return sessions, next_key
+
 class SessionsRepositoryRailway:
     def __init__(self, db: Session):
         self.db = db
@@ -13,11 +72,14 @@ class SessionsRepositoryRailway:
     def create_session(self, username: str, session_data: SessionCreate) -> str:
         """Create a new session"""
         session_id = str(uuid.uuid4())
+        data = session_data.dict()
+        data.setdefault("status", "scheduled")
         
         session = SessionModel(
             session_id=session_id,
             username=username,
-            session_data=json.dumps(session_data.dict())
+            session_data=json.dumps(data),
+            **{field: data.get(field) for field in SESSION_PROMOTED_FIELDS}
         )
         
         self.db.add(session)
@@ -45,7 +107,12 @@ class SessionsRepositoryRailway:
         
         # Update only provided fields
         update_data = updates.dict(exclude_unset=True)
-        session.session_data = json.dumps(update_data)
+        data = json.loads(session.session_data)
+        data.update(update_data)
+        session.session_data = json.dumps(data)
+        for field in SESSION_PROMOTED_FIELDS:
+            if field in update_data:
+                setattr(session, field, update_data[field])
         
         self.db.commit()
         self.db.refresh(session)
@@ -68,18 +135,23 @@ class SessionsRepositoryRailway:
     
     def get_sessions_by_date(self, username: str, date_str: str) -> List[SessionModel]:
         """Get sessions for a specific date"""
-        # This is a simplified implementation
-        # In a real app, you might want to store date separately or parse session_data
-        all_sessions = self.get_sessions(username)
-        today_sessions = []
-        
-        for session in all_sessions:
-            try:
-                session_data = json.loads(session.session_data)
-                # Check if session has a date field that matches
-                if session_data.get('date') == date_str:
-                    today_sessions.append(session)
-            except (json.JSONDecodeError, KeyError):
-                continue
-        
-        return today_sessions
+        return self.db.query(SessionModel).filter(
+            SessionModel.username == username,
+            SessionModel.date == date_str
+        ).order_by(SessionModel.time).all()
+    
+    def get_sessions_in_range(
+        self,
+        username: str,
+        date_from: str,
+        date_to: str,
+        limit: int,
+        after: Optional[List[str]] = None,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None
+    ) -> Tuple[List[SessionSchema], Optional[List[str]]]:
+        """Get one keyset page of sessions over a date range"""
+        rows = self.db.execute(
+            sessions_range_query(username, date_from, date_to, limit, after, status, client_id)
+        ).all()
+        return build_sessions_page(rows, limit)
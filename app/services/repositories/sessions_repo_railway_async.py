@@ -0,0 +1,107 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import Session as SessionModel, SESSION_PROMOTED_FIELDS
+from app.models.session import Session as SessionSchema, SessionCreate, SessionUpdate
+from app.services.repositories.sessions_repo_railway import sessions_range_query, build_sessions_page
+import json
+import uuid
+from typing import List, Optional, Tuple
+from datetime import date
+
+class SessionsRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_session(self, username: str, session_data: SessionCreate) -> str:
+        """Create a new session"""
+        session_id = str(uuid.uuid4())
+        data = session_data.dict()
+        data.setdefault("status", "scheduled")
+        
+        session = SessionModel(
+            session_id=session_id,
+            username=username,
+            session_data=json.dumps(data),
+            **{field: data.get(field) for field in SESSION_PROMOTED_FIELDS}
+        )
+        
+        self.db.add(session)
+        await self.db.commit()
+        await self.db.refresh(session)
+        
+        return session_id
+    
+    async def get_sessions(self, username: str) -> List[SessionModel]:
+        """Get all sessions for a user"""
+        result = await self.db.execute(select(SessionModel).where(SessionModel.username == username))
+        return list(result.scalars().all())
+    
+    async def get_session(self, session_id: str, username: str) -> Optional[SessionModel]:
+        """Get a specific session"""
+        result = await self.db.execute(
+            select(SessionModel).where(
+                SessionModel.session_id == session_id,
+                SessionModel.username == username
+            )
+        )
+        return result.scalars().first()
+    
+    async def update_session(self, session_id: str, username: str, updates: SessionUpdate) -> bool:
+        """Update a session"""
+        session = await self.get_session(session_id, username)
+        if not session:
+            return False
+        
+        # Update only provided fields
+        update_data = updates.dict(exclude_unset=True)
+        data = json.loads(session.session_data)
+        data.update(update_data)
+        session.session_data = json.dumps(data)
+        for field in SESSION_PROMOTED_FIELDS:
+            if field in update_data:
+                setattr(session, field, update_data[field])
+        
+        await self.db.commit()
+        await self.db.refresh(session)
+        return True
+    
+    async def delete_session(self, session_id: str, username: str) -> bool:
+        """Delete a session"""
+        session = await self.get_session(session_id, username)
+        if not session:
+            return False
+        
+        await self.db.delete(session)
+        await self.db.commit()
+        return True
+    
+    async def get_today_sessions(self, username: str) -> List[SessionModel]:
+        """Get sessions for today"""
+        today = date.today().isoformat()
+        return await self.get_sessions_by_date(username, today)
+    
+    async def get_sessions_by_date(self, username: str, date_str: str) -> List[SessionModel]:
+        """Get sessions for a specific date"""
+        result = await self.db.execute(
+            select(SessionModel).where(
+                SessionModel.username == username,
+                SessionModel.date == date_str
+            ).order_by(SessionModel.time)
+        )
+        return list(result.scalars().all())
+    
+    async def get_sessions_in_range(
+        self,
+        username: str,
+        date_from: str,
+        date_to: str,
+        limit: int,
+        after: Optional[List[str]] = None,
+        status: Optional[str] = None,
+        client_id: Optional[str] = None
+    ) -> Tuple[List[SessionSchema], Optional[List[str]]]:
+        """Get one keyset page of sessions over a date range"""
+        result = await self.db.execute(
+            sessions_range_query(username, date_from, date_to, limit, after, status, client_id)
+        )
+        return build_sessions_page(result.all(), limit)
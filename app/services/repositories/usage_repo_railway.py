@@ -0,0 +1,79 @@
+from sqlalchemy import select, insert, case
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.database import ChatUsage
+from app.models.chat import UsageSummary
+from typing import List, Optional, Dict, Any
+from datetime import datetime, date, time, timedelta, timezone
+
+USAGE_GROUPINGS = {
+    "day": func.date(ChatUsage.created_at),
+    "client": ChatUsage.client_id,
+    "model": ChatUsage.model,
+}
+
+def usage_summary_query(
+    group_by: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[str] = None,
+    model: Optional[str] = None
+):
+    """Aggregate chat_usage rows per day, client or model.
+
+    Token totals and average latency only count upstream calls; cache hits
+    are counted separately since they cost no quota.
+    """
+    key = USAGE_GROUPINGS[group_by]
+    upstream = ChatUsage.cache_hit.is_(False)
+    query = select(
+        key.label("key"),
+        func.count().label("requests"),
+        func.sum(case((ChatUsage.cache_hit, 1), else_=0)).label("cache_hits"),
+        func.sum(case((upstream, ChatUsage.tokens_in), else_=0)).label("tokens_in"),
+        func.sum(case((upstream, ChatUsage.tokens_out), else_=0)).label("tokens_out"),
+        func.avg(case((upstream, ChatUsage.latency_ms))).label("avg_latency_ms")
+    )
+    if date_from:
+        query = query.where(ChatUsage.created_at >= datetime.combine(date_from, time.min, tzinfo=timezone.utc))
+    if date_to:
+        query = query.where(ChatUsage.created_at < datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc))
+    if client_id:
+        query = query.where(ChatUsage.client_id == client_id)
+    if model:
+        query = query.where(ChatUsage.model == model)
+    return query.group_by(key).order_by(key)
+
+def build_usage_summary(rows) -> List[UsageSummary]:
+    return [
+        UsageSummary(
+            key=str(row.key) if row.key is not None else None,
+            requests=row.requests,
+            cache_hits=row.cache_hits or 0,
+            tokens_in=row.tokens_in or 0,
+            tokens_out=row.tokens_out or 0,
+            avg_latency_ms=round(float(row.avg_latency_ms or 0), 1)
+        )
+        for row in rows
+    ]
+
+class UsageRepositoryRailway:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def add_usage(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert a batch of usage rows in one executemany"""
+        self.db.execute(insert(ChatUsage), rows)
+        self.db.commit()
+    
+    def get_usage_summary(
+        self,
+        group_by: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        client_id: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> List[UsageSummary]:
+        """Get usage totals grouped by day, client or model"""
+        rows = self.db.execute(usage_summary_query(group_by, date_from, date_to, client_id, model)).all()
+        return build_usage_summary(rows)
@@ -0,0 +1,28 @@
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import ChatUsage
+from app.models.chat import UsageSummary
+from app.services.repositories.usage_repo_railway import usage_summary_query, build_usage_summary
+from typing import List, Optional, Dict, Any
+from datetime import date
+
+class UsageRepositoryRailwayAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def add_usage(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert a batch of usage rows in one executemany"""
+        await self.db.execute(insert(ChatUsage), rows)
+        await self.db.commit()
+    
+    async def get_usage_summary(
+        self,
+        group_by: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        client_id: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> List[UsageSummary]:
+        """Get usage totals grouped by day, client or model"""
+        result = await self.db.execute(usage_summary_query(group_by, date_from, date_to, client_id, model))
+        return build_usage_summary(result.all())
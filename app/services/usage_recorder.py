@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.db_railway import call_repository
+from app.services.repositories.usage_repo_railway import UsageRepositoryRailway
+from app.services.repositories.usage_repo_railway_async import UsageRepositoryRailwayAsync
+
+class UsageRecorder:
+    """Write-behind buffer for chat usage rows.
+
+    ``record`` only appends to an in-memory list, so the chat path never
+    waits on the database. A background task writes the buffer in one
+    batched INSERT every ``flush_interval`` seconds, or sooner once
+    ``batch_size`` rows are waiting. If a write fails the rows are kept for
+    the next attempt, up to ``max_buffer`` rows; beyond that new rows are
+    dropped and counted.
+    """
+    def __init__(self, flush_interval: float, batch_size: int, max_buffer: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        flow: str,
+        model: Optional[str],
+        tokens_in: int,
+        tokens_out: int,
+        latency_ms: int,
+        cache_hit: bool = False,
+        client_id: Optional[str] = None
+    ):
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append({
+            "created_at": datetime.now(timezone.utc),
+            "flow": flow,
+            "client_id": client_id,
+            "model": model,
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "latency_ms": latency_ms,
+            "cache_hit": cache_hit,
+        })
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        async with self._flush_lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return
+            try:
+                await call_repository(UsageRepositoryRailway, UsageRepositoryRailwayAsync, "add_usage", rows)
+                self.written += len(rows)
+            except Exception as e:
+                self.failed_flushes += 1
+                print(f"Error writing chat usage ({len(rows)} rows): {e}")
+                # Keep the oldest rows for the next attempt, within the buffer limit
+                kept = (rows + self._buffer)[:self.max_buffer]
+                self.dropped += len(rows) + len(self._buffer) - len(kept)
+                self._buffer = kept
+
+    async def close(self):
+        """Stop the flush task and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+def create_usage_recorder() -> Optional[UsageRecorder]:
+    """Build the usage recorder, or None when usage accounting is disabled"""
+    if not settings.CHAT_USAGE_ENABLED:
+        return None
+    return UsageRecorder(
+        flush_interval=settings.CHAT_USAGE_FLUSH_INTERVAL,
+        batch_size=settings.CHAT_USAGE_BATCH_SIZE,
+        max_buffer=settings.CHAT_USAGE_MAX_BUFFER
+    )
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Compare plan storage codecs (PLAN_STORAGE_CODEC): stored size per plan and
+encode/decode time. Codecs whose package is not installed are skipped.
+
+Usage (from the project root): python -m benchmarks.plan_codecs [workouts_per_day ...]
+"""
+
+import json
+import sys
+import timeit
+from app.models.plan_codec import CODECS, PlanCodec
+from benchmarks.plan_reads import stored_plan
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 20, 100]
+    print(f"{'workouts/day':>12} {'codec':>13} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for size in sizes:
+        plan_data = json.loads(stored_plan(size))
+        for name in CODECS:
+            try:
+                codec = PlanCodec(name)
+            except RuntimeError as e:
+                print(f"{size:>12} {name:>13} skipped: {e}")
+                continue
+            text, blob = codec.encode(plan_data)
+            assert codec.decode(text, blob) == plan_data
+            stored_bytes = len(blob) if blob else len(text.encode())
+            timings = []
+            for fn in (lambda: codec.encode(plan_data), lambda: codec.decode(text, blob)):
+                runs, total = timeit.Timer(fn).autorange()
+                timings.append(total / runs * 1e6)
+            print(f"{size:>12} {name:>13} {stored_bytes:>8} {timings[0]:>10.1f} {timings[1]:>10.1f}")
+
+if __name__ == "__main__":
+    main()
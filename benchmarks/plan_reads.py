@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compare the cost of serving a stored week plan on GET /plans/weeks/{client_id}.
+
+"validated" is the old read path: json.loads the stored plan_data, build a
+WeekPlan, re-validate it against the response model and encode it again.
+"passthrough" is the current path: splice client_id/week_start_iso around
+the stored JSON (week_plan_json). Database time is left out; it is the
+same for both.
+
+Usage (from the project root): python -m benchmarks.plan_reads [workouts_per_day ...]
+"""
+
+import json
+import sys
+import timeit
+from fastapi.encoders import jsonable_encoder
+from app.models.plan import WeekPlan
+from app.models.plan_codec import dumps_json
+from app.services.repositories.plans_repo_railway import week_plan_json
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def stored_plan(workouts_per_day: int) -> str:
+    return dumps_json({'days': [
+        {
+            'day': day,
+            'workouts': [
+                {'exercise': f"Exercise {i}", 'sets': 4, 'reps': 8, 'rest_sec': 90, 'notes': "Keep the tempo controlled"}
+                for i in range(workouts_per_day)
+            ]
+        }
+        for day in DAYS
+    ]})
+
+def validated(client_id: str, week_start_iso: str, plan_data: str) -> bytes:
+    plan = WeekPlan(client_id=client_id, week_start_iso=week_start_iso, days=json.loads(plan_data).get('days', []))
+    # What FastAPI does with response_model=WeekPlan before sending
+    checked = WeekPlan.model_validate(plan.model_dump())
+    return json.dumps(jsonable_encoder(checked)).encode()
+
+def passthrough(client_id: str, week_start_iso: str, plan_data: str) -> bytes:
+    return week_plan_json(client_id, week_start_iso, plan_data).encode()
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 20, 100]
+    print(f"{'workouts/day':>12} {'bytes':>8} {'validated us':>13} {'passthrough us':>15} {'speedup':>8}")
+    for size in sizes:
+        plan_data = stored_plan(size)
+        args = ("client-1", "2025-01-06", plan_data)
+        assert json.loads(validated(*args)) == json.loads(passthrough(*args))
+        results = []
+        for fn in (validated, passthrough):
+            runs, total = timeit.Timer(lambda: fn(*args)).autorange()
+            results.append(total / runs * 1e6)
+        print(f"{size:>12} {len(plan_data):>8} {results[0]:>13.1f} {results[1]:>15.1f} {results[0] / results[1]:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+import pytest
+from groq import APITimeoutError
+from app.services.groq_resilience import CircuitBreaker, CircuitOpenError, GroqAdmission
+from app.services.model_router import FAST, LARGE, ModelRoute, ModelRouter
+
+def make_router():
+    routes = [ModelRoute("bad", 1.0), ModelRoute("good", 1.0)]
+    return ModelRouter(
+        tiers={FAST: routes, LARGE: routes},
+        fast_max_input_tokens=100,
+        cooldown=30.0,
+        breaker_failure_threshold=5,
+        breaker_reset_timeout=30.0
+    )
+
+def make_admission():
+    return GroqAdmission(max_concurrency=10, queue_timeout=1.0, max_retries=2, base_delay=0.0, max_delay=0.0)
+
+def make_attempt(admission):
+    async def attempt(route, is_last):
+        async def create():
+            await asyncio.sleep(0)
+            if route.model == "bad":
+                raise APITimeoutError(request=httpx.Request("POST", "https://api.groq.test"))
+            return "ok"
+        return await admission.call(create, route.breaker, max_retries=None if is_last else 0)
+    return attempt
+
+def test_failing_model_does_not_open_breaker_for_healthy_one():
+    router, admission = make_router(), make_admission()
+    attempt = make_attempt(admission)
+
+    async def chats():
+        return await asyncio.gather(*(router.run(FAST, attempt) for _ in range(6)))
+
+    results = asyncio.run(chats())
+    assert results == [("ok", "good")] * 6
+    assert router.routes["bad"].breaker.state == CircuitBreaker.OPEN
+    assert router.routes["good"].breaker.state == CircuitBreaker.CLOSED
+    # Later requests skip the open model entirely
+    assert [route.model for route in router.order(FAST)] == ["good", "bad"]
+    assert asyncio.run(router.run(FAST, attempt)) == ("ok", "good")
+
+def test_open_breaker_on_last_model_is_raised():
+    router, admission = make_router(), make_admission()
+    for route in router.routes.values():
+        for _ in range(5):
+            route.breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(router.run(FAST, make_attempt(admission)))